@@ -2,8 +2,9 @@ import numpy as np
 import matplotlib.pyplot as plt
 from matplotlib import cm
 from sklearn.datasets import make_moons
-from regrad import Var
+from regrad import Var, no_grad
 from tools.nn import MLP
+from tools.optim import SGD
 
 data, label = make_moons(n_samples=130, noise=0.15)
 label = label * 2 - 1  # make y be -1 or 1
@@ -22,11 +23,11 @@ def loss(batch_size=None):
     x_input = [list(map(Var, x_row)) for x_row in x]
     output_y = list(map(model, x_input))
     loss_value = [(1 + -yi * output_yi).relu() for yi, output_yi in zip(y, output_y)]
-    data_loss = sum(loss_value) * (1.0 / len(loss_value))
+    data_loss = Var.sum(loss_value) * (1.0 / len(loss_value))
 
     # L2 regularization
     alpha = 1e-4
-    reg_loss = alpha * sum((p * p for p in model.parameters()))
+    reg_loss = alpha * Var.dot(model.parameters(), model.parameters())
     total_loss_ = data_loss + reg_loss
 
     accuracy = [(yi > 0) == (output_yi.val > 0) for yi, output_yi in zip(y, output_y)]
@@ -37,19 +38,19 @@ total_loss, acc = loss()
 print(total_loss, acc)
 
 # optimization
+optimizer = SGD(model, lr=1.0)
 for epoch in range(100):
 
     # forward
     total_loss, acc = loss()
 
     # backward
-    model.zero_grad()
+    optimizer.zero_grad()
     total_loss.backward()
 
     # update (sgd)
-    learning_rate = 1.0 - 0.9 * epoch / 100
-    for p in model.parameters():
-        p.val -= learning_rate * p.grad
+    optimizer.lr = 1.0 - 0.9 * epoch / 100
+    optimizer.step()
 
     if epoch % 1 == 0:
         print(f"step {epoch} loss {total_loss.val:.4f}, accuracy {acc * 100:.1f}%")
@@ -62,9 +63,10 @@ y_min, y_max = data[:, 1].min() - 1, data[:, 1].max() + 1
 xx, yy = np.meshgrid(np.arange(x_min, x_max, h),
                      np.arange(y_min, y_max, h))
 x_mesh = np.c_[xx.ravel(), yy.ravel()]
-inputs = [list(map(Var, x_row)) for x_row in x_mesh]
-m_output_y = list(map(model, inputs))
-z = np.array([s.val > 0 for s in m_output_y])
+# batch mode: one graph over every mesh point
+with no_grad():
+    m_output_y = model([Var(x_mesh[:, 0]), Var(x_mesh[:, 1])])
+z = m_output_y.val > 0
 z = z.reshape(xx.shape)
 
 fig = plt.figure()
@@ -0,0 +1,24 @@
+import time
+from regrad import Var
+
+
+def build_chain(depth: int) -> tuple[Var, Var]:
+    x = Var(0.5, req_grad=True)
+    y = x
+    for _ in range(depth):
+        y = y * 1.0 + 0.0
+    return x, y
+
+
+def bench_backward(depth: int) -> float:
+    _, y = build_chain(depth)
+    start = time.perf_counter()
+    y.backward()
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    # each step adds two nodes, so the deepest graph here has two million levels
+    for depth in (1_000, 10_000, 100_000, 1_000_000):
+        seconds = bench_backward(depth)
+        print(f"depth {depth:>9,d}  backward {seconds:8.4f}s  {seconds / depth * 1e6:6.3f} us/step")
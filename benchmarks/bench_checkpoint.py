@@ -0,0 +1,36 @@
+import time
+import tracemalloc
+from regrad import Var, checkpoint_sequential
+from regrad.variable import _computed_node_dfs
+
+
+def run(n_steps: int, mode: str) -> None:
+    a, x0 = Var(1.3, req_grad=True), Var(0.4, req_grad=True)
+
+    def step(x: Var) -> Var:
+        return x + 0.01 * (x * a).sin() - 0.005 * x.tanh()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    if mode == "plain":
+        x = x0
+        for _ in range(n_steps):
+            x = step(x)
+    elif mode == "sqrt":
+        x = checkpoint_sequential(step, x0, n_steps)
+    else:
+        x = checkpoint_sequential(step, x0, n_steps, budget=int(mode))
+    live_nodes = len(_computed_node_dfs(x))
+    x.backward()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{mode:>8s}  nodes kept by forward {live_nodes:>8,d}  peak memory {peak / 2 ** 20:7.2f} MiB"
+          f"  time {seconds:.3f}s")
+
+
+if __name__ == "__main__":
+    n = 40_000
+    print(f"{n:,d} time steps")
+    for mode in ("plain", "sqrt", "20000", "5000"):
+        run(n, mode)
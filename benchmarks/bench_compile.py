@@ -0,0 +1,29 @@
+import random
+import time
+import regrad
+from regrad import Var
+from tools.nn import MLP
+
+
+def sample_loss(model: MLP, x: list[Var], y: float) -> Var:
+    return (1 + -y * model(x)).relu()
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    model = MLP(2, [16, 16, 1])
+    data = [((random.uniform(-1, 2), random.uniform(-1, 1)), random.choice((-1.0, 1.0))) for _ in range(130)]
+    compiled = regrad.compile(lambda x, y: sample_loss(model, x, y))
+    compiled([Var(0.0), Var(0.0)], 1.0)  # trace
+
+    start = time.perf_counter()
+    for (x1, x2), y in data:
+        sample_loss(model, [Var(x1), Var(x2)], y).backward()
+    interpreted = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for (x1, x2), y in data:
+        compiled([Var(x1), Var(x2)], y)
+    generated = time.perf_counter() - start
+    print(f"130 samples forward+backward  graph {interpreted * 1e3:.1f}ms  compiled {generated * 1e3:.1f}ms"
+          f"  ({interpreted / generated:.1f}x)")
@@ -0,0 +1,57 @@
+import random
+import time
+import numpy as np
+from regrad import Tape, Var, hvp
+from tools.nn import MLP
+from .bench_per_sample import build_losses
+
+
+def gradient(model: MLP, tape: Tape) -> np.ndarray:
+    # one replayed forward and backward of the recorded loss
+    model.zero_grad()
+    tape.forward()
+    tape.backward()
+    return model.store.grads.copy()
+
+
+def finite_difference(model: MLP, tape: Tape, v: np.ndarray, eps: float) -> np.ndarray:
+    # central differences of the gradient along v, two gradient evaluations
+    params = model.store.values
+    params += eps * v
+    plus = gradient(model, tape)
+    params -= 2 * eps * v
+    minus = gradient(model, tape)
+    params += eps * v
+    return (plus - minus) / (2 * eps)
+
+
+def best_of(fn, repeat: int = 5) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    model = MLP(2, [16, 16, 1])
+    params = model.parameters()
+    data = rng.uniform(-1, 1, (64, 2))
+    label = np.where(data[:, 0] * data[:, 1] > 0, 1.0, -1.0)
+    loss = Var.sum(build_losses(model, data, label)) + 1e-3 * Var.sum([p * p for p in params])
+    tape = Tape(loss)
+    v = rng.uniform(-1, 1, len(params))
+
+    t_grad, _ = best_of(lambda: gradient(model, tape))
+    t_hvp, (_, exact) = best_of(lambda: hvp(loss, params, v, tape))
+    exact = np.array(exact)
+    print(f"{len(params)} parameters, {len(tape)} instructions")
+    print(f"gradient          {t_grad * 1e3:8.2f}ms")
+    print(f"hvp (exact)       {t_hvp * 1e3:8.2f}ms  ({t_hvp / t_grad:.2f} gradients)")
+    for eps in (1e-2, 1e-4, 1e-6, 1e-8):
+        t_fd, fd = best_of(lambda: finite_difference(model, tape, v, eps))
+        error = np.linalg.norm(fd - exact) / np.linalg.norm(exact)
+        print(f"finite diff {eps:.0e} {t_fd * 1e3:8.2f}ms  ({t_fd / t_grad:.2f} gradients)  relative error {error:.1e}")
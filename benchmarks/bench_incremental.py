@@ -0,0 +1,56 @@
+import math
+import random
+import time
+from regrad import Var, Tape, trace
+from tools.nn import MLP
+from .bench_nodes import build_loss
+
+
+def finite_differences(tape: Tape, leaves: list[Var], incremental: bool, eps: float = 1e-6) -> list[float]:
+    # central differences, moving one leaf at a time
+    out = []
+    for leaf in leaves:
+        val = leaf.val
+        leaf.val = val + eps
+        hi = tape.forward([leaf]) if incremental else tape.forward()
+        leaf.val = val - eps
+        lo = tape.forward([leaf]) if incremental else tape.forward()
+        leaf.val = val
+        tape.forward([leaf]) if incremental else tape.forward()
+        out.append((hi - lo) / (2 * eps))
+    return out
+
+
+def timed(fn, *args) -> tuple[float, list[float]]:
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+if __name__ == "__main__":
+    random.seed(0)
+
+    # a sum of many independent terms, one leaf changes per evaluation
+    n = 20000
+    xs = [Var(random.uniform(-1, 1), req_grad=True) for _ in range(n)]
+    with trace():
+        root = Var.sum([(x * x + 1.0).log() * x.sin() for x in xs])
+    tape = Tape(root)
+    coords = random.sample(xs, 50)
+    full, fd_full = timed(finite_differences, tape, coords, False)
+    inc, fd_inc = timed(finite_differences, tape, coords, True)
+    assert all(math.isclose(p, q, rel_tol=1e-6, abs_tol=1e-6) for p, q in zip(fd_full, fd_inc))
+    print(f"wide sum, {len(tape)} instructions: full replay {full / 150 * 1e3:7.3f}ms/eval"
+          f"  incremental {inc / 150 * 1e3:7.3f}ms/eval  ({full / inc:.0f}x)")
+
+    # finite differences over the parameters of the basic_3_nn.py loss
+    model = MLP(2, [16, 16, 1])
+    data = [(random.uniform(-1, 2), random.uniform(-1, 1)) for _ in range(130)]
+    label = [random.choice((-1, 1)) for _ in range(130)]
+    tape = Tape(build_loss(model, data, label))
+    params = random.sample(model.parameters(), 20)
+    full, fd_full = timed(finite_differences, tape, params, False)
+    inc, fd_inc = timed(finite_differences, tape, params, True)
+    assert all(math.isclose(p, q, rel_tol=1e-6, abs_tol=1e-6) for p, q in zip(fd_full, fd_inc))
+    print(f"mlp loss, {len(tape)} instructions: full replay {full / 60 * 1e3:7.3f}ms/eval"
+          f"  incremental {inc / 60 * 1e3:7.3f}ms/eval  ({full / inc:.1f}x)")
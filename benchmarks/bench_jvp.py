@@ -0,0 +1,35 @@
+import random
+import time
+from regrad import Var, jvp
+from tools.nn import MLP
+
+
+def reverse_column(model: MLP, x: tuple[float, float]) -> list[float]:
+    # one backward per output, the graph is rebuilt because backward frees it
+    column = []
+    for i in range(len(model.layers[-1].neurons)):
+        x1, x2 = Var(x[0], req_grad=True), Var(x[1])
+        model([x1, x2])[i].backward()
+        column.append(x1.grad)
+    return column
+
+
+def forward_column(model: MLP, x: tuple[float, float]) -> list[float]:
+    _, column = jvp(lambda x1, x2: model([x1, x2]), x, (1.0, 0.0))
+    return column
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    x = (0.3, -0.7)
+    for n_out in (4, 16, 64):
+        model = MLP(2, [16, 16, n_out])
+        timings = []
+        for column_fn in (reverse_column, forward_column):
+            start = time.perf_counter()
+            for _ in range(10):
+                column_fn(model, x)
+            timings.append((time.perf_counter() - start) / 10)
+        reverse, forward = timings
+        print(f"jacobian {n_out:>3d}x1  reverse {reverse * 1e3:8.2f}ms  forward {forward * 1e3:7.2f}ms"
+              f"  ({reverse / forward:.1f}x)")
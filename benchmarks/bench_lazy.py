@@ -0,0 +1,43 @@
+import time
+import numpy as np
+from regrad import Var, lazy
+
+
+def candidates(x: Var, n: int) -> list[Var]:
+    # n speculative expressions over the same input, each a chain of 20 ops
+    out = []
+    for k in range(n):
+        y = x
+        for _ in range(5):
+            y = (y * (1.0 + k * 1e-3)).tanh() + y.sin() * 0.5
+        out.append(y)
+    return out
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def eager(x_val, n: int, read: int) -> None:
+    ys = candidates(Var(x_val, req_grad=True), n)
+    for y in ys[:read]:
+        y.val
+
+
+def deferred(x_val, n: int, read: int) -> None:
+    with lazy():
+        ys = candidates(Var(x_val, req_grad=True), n)
+    for y in ys[:read]:
+        y.val
+
+
+if __name__ == "__main__":
+    # scalars: recording a node costs about as much as computing it, arrays: the forward dominates
+    for name, x_val, n in (("scalar", 0.3, 2000), ("10k array", np.linspace(-1, 1, 10000), 200)):
+        for read in (1, n // 10, n):
+            t_eager = min(timed(lambda: eager(x_val, n, read)) for _ in range(3))
+            t_lazy = min(timed(lambda: deferred(x_val, n, read)) for _ in range(3))
+            print(f"{name:>9s} {n} candidates, {read:>4d} read  eager {t_eager * 1e3:7.2f}ms"
+                  f"  lazy {t_lazy * 1e3:7.2f}ms  ({t_eager / t_lazy:.2f}x)")
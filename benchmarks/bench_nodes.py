@@ -0,0 +1,47 @@
+import random
+import time
+import tracemalloc
+from regrad import Var
+from tools.nn import MLP
+
+
+def build_loss(model: MLP, data: list[tuple[float, float]], label: list[int]) -> Var:
+    # the same graph shape as the loss in basic_3_nn.py
+    output_y = [model([Var(x1), Var(x2)]) for x1, x2 in data]
+    loss_value = [(1 + -yi * output_yi).relu() for yi, output_yi in zip(label, output_y)]
+    data_loss = Var.sum(loss_value) * (1.0 / len(loss_value))
+    reg_loss = 1e-4 * Var.dot(model.parameters(), model.parameters())
+    return data_loss + reg_loss
+
+
+def count_nodes(root: Var) -> int:
+    visited = {root}
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        for p in node.src or ():
+            if p not in visited:
+                visited.add(p)
+                stack.append(p)
+    return len(visited)
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    model = MLP(2, [16, 16, 1])
+    data = [(random.uniform(-1, 2), random.uniform(-1, 1)) for _ in range(130)]
+    label = [random.choice((-1, 1)) for _ in range(130)]
+
+    tracemalloc.start()
+    loss = build_loss(model, data, label)
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n_nodes = count_nodes(loss)
+    print(f"nodes {n_nodes:,d}  {size / n_nodes:.1f} bytes/node")
+
+    start = time.perf_counter()
+    repeat = 5
+    for _ in range(repeat):
+        build_loss(model, data, label)
+    seconds = (time.perf_counter() - start) / repeat
+    print(f"forward {seconds:.4f}s  {n_nodes / seconds:,.0f} nodes/s")
@@ -0,0 +1,36 @@
+import random
+import time
+import numpy as np
+from regrad import Var
+from tools.nn import MLP
+from tools.parallel import DataParallel
+
+
+def hinge_loss(model: MLP, x: np.ndarray, y: np.ndarray) -> Var:
+    # the scalar path of basic_3_nn.py, summed over the shard
+    return Var.sum([(1 + -yi * model([Var(x1), Var(x2)])).relu() for (x1, x2), yi in zip(x.tolist(), y.tolist())])
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-1, 1, (512, 2))
+    y = np.where(x[:, 0] * x[:, 1] > 0, 1.0, -1.0)
+    model = MLP(2, [16, 16, 1])
+
+    start = time.perf_counter()
+    for _ in range(5):
+        model.zero_grad()
+        hinge_loss(model, x, y).backward()
+    serial = (time.perf_counter() - start) / 5
+    print(f"serial      {serial * 1e3:8.2f}ms/step")
+
+    for processes in (1, 2, 4):
+        with DataParallel(model, hinge_loss, processes=processes) as parallel:
+            parallel.step(x, y)  # warm up the pool
+            start = time.perf_counter()
+            for _ in range(5):
+                model.zero_grad()
+                parallel.step(x, y)
+            elapsed = (time.perf_counter() - start) / 5
+        print(f"{processes} processes {elapsed * 1e3:8.2f}ms/step  ({serial / elapsed:.2f}x)")
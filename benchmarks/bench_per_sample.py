@@ -0,0 +1,42 @@
+import random
+import time
+import numpy as np
+from regrad import Var, per_sample_grads
+from tools.nn import MLP
+
+
+def build_losses(model: MLP, data: np.ndarray, label: np.ndarray) -> list[Var]:
+    return [(1 + -yi * model([Var(x1), Var(x2)])).relu() for (x1, x2), yi in zip(data.tolist(), label.tolist())]
+
+
+def loop(model: MLP, losses: list[Var]) -> np.ndarray:
+    # one backward per sample, copying the gradient out of the store in between
+    out = np.empty((len(losses), model.store.size))
+    for s, loss in enumerate(losses):
+        model.zero_grad()
+        loss.backward()
+        out[s] = model.store.grads
+    return out
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    model = MLP(2, [16, 16, 1])
+    params = model.parameters()
+    for n_samples in (64, 256):
+        data = rng.uniform(-1, 1, (n_samples, 2))
+        label = np.where(data[:, 0] * data[:, 1] > 0, 1.0, -1.0)
+        timings = []
+        for fn in (lambda losses: loop(model, losses), lambda losses: per_sample_grads(losses, params)):
+            best = float("inf")
+            for _ in range(5):
+                losses = build_losses(model, data, label)
+                start = time.perf_counter()
+                result = fn(losses)
+                best = min(best, time.perf_counter() - start)
+            assert result.shape == (n_samples, len(params))
+            timings.append(best)
+        looped, single = timings
+        print(f"{n_samples:>4d} samples  loop {looped * 1e3:8.2f}ms  single pass {single * 1e3:8.2f}ms"
+              f"  ({looped / single:.2f}x)")
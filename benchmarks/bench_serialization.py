@@ -0,0 +1,31 @@
+import os
+import random
+import tempfile
+import time
+from regrad import save_graph, load_graph
+from tools.nn import MLP
+from .bench_nodes import build_loss, count_nodes
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    model = MLP(2, [16, 16, 1])
+    for n_samples in (130, 1300):
+        data = [(random.uniform(-1, 2), random.uniform(-1, 1)) for _ in range(n_samples)]
+        label = [random.choice((-1, 1)) for _ in range(n_samples)]
+        build, loss = timed(build_loss, model, data, label)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "loss.graph")
+            save, _ = timed(save_graph, loss, path)
+            load, graph = timed(load_graph, path)
+            rebuild, nodes = timed(graph.to_vars)
+            assert nodes[-1].val == loss.val
+            size = os.path.getsize(path)
+        print(f"{count_nodes(loss):>7,d} nodes  {size / 2 ** 20:6.2f}MiB  build {build * 1e3:7.1f}ms  "
+              f"save {save * 1e3:7.1f}ms  mmap load {load * 1e3:5.2f}ms  to_vars {rebuild * 1e3:7.1f}ms")
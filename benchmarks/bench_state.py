@@ -0,0 +1,42 @@
+import os
+import pickle
+import random
+import tempfile
+import time
+from tools.nn import MLP
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    out = fn(*args)
+    return time.perf_counter() - start, out
+
+
+def pickle_save(model: MLP, path: str) -> None:
+    with open(path, "wb") as f:
+        pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def pickle_load(path: str) -> MLP:
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    for tensor, n_layers_out in ((False, [64, 64, 1]), (False, [256, 256, 1]), (True, [512, 512, 10])):
+        model = MLP(784 if tensor else 2, n_layers_out, tensor=tensor)
+        with tempfile.TemporaryDirectory() as tmp:
+            pickle_path, path = os.path.join(tmp, "model.pkl"), os.path.join(tmp, "model.bin")
+            pickle_dump_time, _ = timed(pickle_save, model, pickle_path)
+            pickle_load_time, _ = timed(pickle_load, pickle_path)
+            save_time, _ = timed(model.save, path)
+            load_time, loaded = timed(MLP.load, path)
+            state = loaded.state_dict()
+            restore_time, _ = timed(model.load_state_dict, state)
+            assert (loaded.store.values == model.store.values).all()
+            sizes = os.path.getsize(pickle_path), os.path.getsize(path)
+        print(f"{'tensor' if tensor else 'scalar'} {model.store.size:>7,d} params  "
+              f"pickle {sizes[0] / 2 ** 20:6.2f}MiB dump {pickle_dump_time * 1e3:7.1f}ms load {pickle_load_time * 1e3:7.1f}ms  "
+              f"save {sizes[1] / 2 ** 20:6.2f}MiB {save_time * 1e3:6.1f}ms load {load_time * 1e3:7.1f}ms  "
+              f"load_state_dict {restore_time * 1e3:5.2f}ms")
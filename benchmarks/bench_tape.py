@@ -0,0 +1,35 @@
+import random
+import time
+from regrad import Tape
+from tools.nn import MLP
+from .bench_nodes import build_loss
+
+
+def bench_rebuild(model: MLP, data, label, steps: int) -> float:
+    start = time.perf_counter()
+    for _ in range(steps):
+        loss = build_loss(model, data, label)
+        model.zero_grad()
+        loss.backward()
+    return (time.perf_counter() - start) / steps
+
+
+def bench_replay(model: MLP, data, label, steps: int) -> float:
+    tape = Tape(build_loss(model, data, label))
+
+    start = time.perf_counter()
+    for _ in range(steps):
+        tape.forward()
+        model.zero_grad()
+        tape.backward()
+    return (time.perf_counter() - start) / steps
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    model = MLP(2, [16, 16, 1])
+    data = [(random.uniform(-1, 2), random.uniform(-1, 1)) for _ in range(130)]
+    label = [random.choice((-1, 1)) for _ in range(130)]
+    rebuild = bench_rebuild(model, data, label, 5)
+    replay = bench_replay(model, data, label, 5)
+    print(f"rebuild graph {rebuild:.4f}s/step  tape replay {replay:.4f}s/step  ({rebuild / replay:.1f}x)")
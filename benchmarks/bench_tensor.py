@@ -0,0 +1,49 @@
+import random
+import time
+import numpy as np
+from regrad import Var
+from tools.nn import MLP
+from tools.optim import SGD
+
+
+def scalar_epoch(model: MLP, optimizer: SGD, data: np.ndarray, label: np.ndarray) -> float:
+    # one full-batch step of basic_3_nn.py
+    output_y = [model([Var(x1), Var(x2)]) for x1, x2 in data.tolist()]
+    loss_value = [(1 + -yi * output_yi).relu() for yi, output_yi in zip(label.tolist(), output_y)]
+    data_loss = Var.sum(loss_value) * (1.0 / len(loss_value))
+    reg_loss = 1e-4 * Var.dot(model.parameters(), model.parameters())
+    total_loss = data_loss + reg_loss
+    optimizer.zero_grad()
+    total_loss.backward()
+    optimizer.step()
+    return total_loss.val
+
+
+def tensor_epoch(model: MLP, optimizer: SGD, data: np.ndarray, label: np.ndarray) -> float:
+    out = model(Var(data))
+    data_loss = (1 + -label.reshape(-1, 1) * out).relu().reduce_sum() * (1.0 / len(label))
+    reg_loss = 1e-4 * Var.sum([(p * p).reduce_sum() for p in model.parameters()])
+    total_loss = data_loss + reg_loss
+    optimizer.zero_grad()
+    total_loss.backward()
+    optimizer.step()
+    return total_loss.val
+
+
+if __name__ == "__main__":
+    random.seed(0)
+    rng = np.random.default_rng(0)
+    for n_samples in (130, 1300):
+        data = rng.uniform(-1, 1, (n_samples, 2))
+        label = np.where(data[:, 0] * data[:, 1] > 0, 1.0, -1.0)
+        timings = []
+        for tensor, epoch in ((False, scalar_epoch), (True, tensor_epoch)):
+            model = MLP(2, [16, 16, 1], tensor=tensor)
+            optimizer = SGD(model, lr=0.1)
+            start = time.perf_counter()
+            for _ in range(5):
+                epoch(model, optimizer, data, label)
+            timings.append((time.perf_counter() - start) / 5)
+        scalar, tensor = timings
+        print(f"{n_samples:>5d} samples  scalar {scalar * 1e3:8.2f}ms/epoch  tensor {tensor * 1e3:6.2f}ms/epoch"
+              f"  ({scalar / tensor:.0f}x)")
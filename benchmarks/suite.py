@@ -0,0 +1,223 @@
+import argparse
+import gc
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable
+import numpy as np
+from regrad import Var, ops
+from tools import build_mermaid_script
+from tools.nn import MLP
+from tools.optim import SGD
+from .bench_backward import build_chain
+from .bench_nodes import build_loss
+from .bench_tensor import tensor_epoch
+
+# every case returns the seconds of its measured section and the number of units it covered,
+# the suite keeps the best of a few runs in microseconds per unit, and that value relative to a
+# plain python loop timed alongside each run, which is what the baseline comparison uses
+Case = Callable[[], tuple[float, int]]
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def construct() -> tuple[float, int]:
+    start = time.perf_counter()
+    build_chain(50_000)
+    return time.perf_counter() - start, 100_000
+
+
+def _timed_backward(y: Var, n_nodes: int) -> tuple[float, int]:
+    start = time.perf_counter()
+    y.backward()
+    return time.perf_counter() - start, n_nodes
+
+
+def backward_deep() -> tuple[float, int]:
+    _, y = build_chain(50_000)
+    return _timed_backward(y, 100_000)
+
+
+def backward_wide() -> tuple[float, int]:
+    w = Var(0.5, req_grad=True)
+    y = Var.sum([w * float(i) for i in range(50_000)])
+    return _timed_backward(y, 50_001)
+
+
+def backward_diamond() -> tuple[float, int]:
+    # each level fans out into two branches that join again
+    y = Var(0.5, req_grad=True)
+    for _ in range(20_000):
+        y = y.sin() * y.cos()
+    return _timed_backward(y, 60_000)
+
+
+# inputs and op_args for every op in regrad.ops, the arrays are a batch of 64 samples
+_rng = np.random.default_rng(0)
+_x, _w, _b = _rng.uniform(-1, 1, (64, 16)), _rng.uniform(-1, 1, (8, 16)), _rng.uniform(-1, 1, 8)
+OP_INPUTS: dict[type, tuple[tuple[Any, ...], dict[str, Any], Any]] = {
+    ops.Add: ((0.3, 0.7), {}, 1.0),
+    ops.Sub: ((0.3, 0.7), {}, 1.0),
+    ops.Mul: ((0.3, 0.7), {}, 1.0),
+    ops.Div: ((0.3, 0.7), {}, 1.0),
+    ops.Neg: ((0.3,), {}, 1.0),
+    ops.Pow: ((0.3,), {"power": 3}, 1.0),
+    ops.Exp: ((0.3,), {}, 1.0),
+    ops.Log: ((0.3,), {}, 1.0),
+    ops.Sqrt: ((0.3,), {}, 1.0),
+    ops.Sin: ((0.3,), {}, 1.0),
+    ops.Cos: ((0.3,), {}, 1.0),
+    ops.Tanh: ((0.3,), {}, 1.0),
+    ops.Relu: ((0.3,), {}, 1.0),
+    ops.Sum: (tuple(0.1 * i for i in range(16)), {}, 1.0),
+    ops.Dot: (tuple(0.1 * i for i in range(32)), {}, 1.0),
+    ops.Linear: ((_x, _w, _b), {}, np.ones((64, 8))),
+    ops.ReduceSum: ((_x,), {}, 1.0),
+}
+
+
+def op_case(op_cls: type) -> Case:
+    args, op_args, dy = OP_INPUTS[op_cls]
+
+    def case() -> tuple[float, int]:
+        # one forward and one backward through a fresh op, as _apply and Var.backward do
+        n = 2_000
+        start = time.perf_counter()
+        for _ in range(n):
+            op = op_cls(op_args) if op_args else op_cls()
+            op.forward(*args, **op_args)
+            op.backward(dy)
+        return time.perf_counter() - start, n
+
+    return case
+
+
+def _moons(n_samples: int) -> tuple[list[tuple[float, float]], list[int]]:
+    data = [(random.uniform(-1, 2), random.uniform(-1, 1)) for _ in range(n_samples)]
+    return data, [random.choice((-1, 1)) for _ in range(n_samples)]
+
+
+def mlp_step() -> tuple[float, int]:
+    # one full-batch step of basic_3_nn.py
+    model = MLP(2, [16, 16, 1])
+    optimizer = SGD(model, lr=0.1)
+    data, label = _moons(100)
+    start = time.perf_counter()
+    loss = build_loss(model, data, label)
+    optimizer.zero_grad()
+    loss.backward()
+    optimizer.step()
+    return time.perf_counter() - start, 1
+
+
+def mlp_step_tensor() -> tuple[float, int]:
+    model = MLP(2, [16, 16, 1], tensor=True)
+    data, label = _moons(100)
+    data, label = np.array(data), np.array(label, dtype=np.float64)
+    optimizer = SGD(model, lr=0.1)
+    start = time.perf_counter()
+    tensor_epoch(model, optimizer, data, label)
+    return time.perf_counter() - start, 1
+
+
+def mermaid() -> tuple[float, int]:
+    xs = [Var(0.1 * i, req_grad=True) for i in range(500)]
+    y = Var.sum([x * x.sin() for x in xs])
+    start = time.perf_counter()
+    build_mermaid_script(y)
+    return time.perf_counter() - start, 1501
+
+
+def cases() -> dict[str, tuple[Case, str]]:
+    out = {
+        "apply/construct": (construct, "us/node"),
+        "backward/deep": (backward_deep, "us/node"),
+        "backward/wide": (backward_wide, "us/node"),
+        "backward/diamond": (backward_diamond, "us/node"),
+    }
+    for op_cls in OP_INPUTS:
+        out[f"op/{op_cls.__name__}"] = (op_case(op_cls), "us/call")
+    out["mlp/step"] = (mlp_step, "us/step")
+    out["mlp/step_tensor"] = (mlp_step_tensor, "us/step")
+    out["mermaid/build"] = (mermaid, "us/node")
+    return out
+
+
+def calibrate() -> tuple[float, int]:
+    # plain python of the same flavour as the cases, to cancel out the speed of the machine at the time
+    class Box:
+        __slots__ = ("v",)
+
+        def __init__(self, v: float) -> None:
+            self.v = v
+
+    n = 100_000
+    start = time.perf_counter()
+    box = Box(0.0)
+    for i in range(n):
+        box = Box(box.v * 0.5 + i)
+    return time.perf_counter() - start, n
+
+
+def run(names: list[str], repeat: int) -> dict[str, dict[str, Any]]:
+    random.seed(0)
+    results = {}
+    for name, (case, unit) in cases().items():
+        if names and not any(name.startswith(n) for n in names):
+            continue
+        best, best_calibration = float("inf"), float("inf")
+        for _ in range(repeat):
+            seconds, units = calibrate()
+            best_calibration = min(best_calibration, seconds / units)
+            gc.collect()  # start every run without the garbage of the previous one
+            seconds, units = case()
+            best = min(best, seconds / units)
+        results[name] = {"value": best * 1e6, "unit": unit, "relative": best / best_calibration}
+    return results
+
+
+def compare(
+        results: dict[str, dict[str, Any]],
+        baseline: dict[str, dict[str, Any]],
+        tolerance: float
+) -> list[str]:
+    # the cases that got slower than baseline * (1 + tolerance), relative to the calibration loop
+    return [name for name, r in results.items()
+            if name in baseline and r["relative"] > baseline[name]["relative"] * (1 + tolerance)]
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(description="regrad benchmark suite")
+    parser.add_argument("cases", nargs="*", help="only run the cases starting with one of these names")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="allowed slowdown before a case fails")
+    args = parser.parse_args(argv)
+
+    results = run(args.cases, args.repeat)
+    report = {"python": platform.python_version(), "machine": platform.machine(), "results": results}
+    if args.json is not None:
+        args.json.write_text(json.dumps(report, indent=2) + "\n")
+    baseline = json.loads(args.baseline.read_text())["results"] if args.baseline.exists() else {}
+    if args.save_baseline:
+        # cases left out of this run keep their stored baseline
+        baseline = report["results"] = {**baseline, **results}
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n")
+    regressions = compare(results, baseline, args.tolerance)
+    for name, r in results.items():
+        line = f"{name:<20s} {r['value']:12.3f} {r['unit']:<8s}"
+        if name in baseline:
+            line += f" {r['relative'] / baseline[name]['relative']:6.2f}x baseline"
+        if name in regressions:
+            line += "  REGRESSION"
+        print(line)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1 +1,12 @@
-from .variable import Var
+from .variable import Var, no_grad
+from .tape import Tape, trace
+from .forward import jvp
+from .autograd import grad, jacobian, per_sample_grads
+from .checkpoint import checkpoint, checkpoint_sequential
+from .compiler import compile
+from .cse import cse
+from .simplify import simplify
+from .lazy import lazy
+from .profiler import profile
+from .serialization import save_graph, load_graph
+from .hessian import hvp
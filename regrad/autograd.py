@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+from .ops import np
+from .variable import Var, _computed_node_dfs
+
+
+def _as_list(v: Var | Sequence[Var]) -> list[Var]:
+    return [v] if isinstance(v, Var) else list(v)
+
+
+def grad(
+        outputs: Var | Sequence[Var],
+        inputs: Var | Sequence[Var],
+        grad_outputs: Optional[Sequence[Any]] = None,
+        retain_graph: bool = False
+) -> list[Any]:
+    # sum_j grad_outputs[j] * d outputs[j] / d inputs, returned instead of accumulated into .grad.
+    # A cotangent may be a numpy vector, one reverse sweep then carries every row at once.
+    # Only the subgraph reaching the inputs is visited, inputs the outputs don't depend on get None.
+    outputs, inputs = _as_list(outputs), _as_list(inputs)
+    if grad_outputs is None:
+        grad_outputs = [1.0] * len(outputs)
+    assert len(grad_outputs) == len(outputs), "Every output needs a cotangent."
+
+    grads: dict[Var, Any] = {}
+    for y, dy in zip(outputs, grad_outputs):
+        assert y.req_grad, "Node is not part of a autograd graph."
+        grads[y] = grads[y] + dy if y in grads else dy
+
+    node_queue = _computed_node_dfs(*outputs)
+    keep = set(inputs)
+    # only the nodes with a path to a requested input are backpropagated through
+    reach = set(inputs)
+    for node in node_queue:
+        for p in node.src:
+            if p in reach:
+                reach.add(node)
+                break
+
+    for node in reversed(node_queue):
+        if node in reach:
+            dy = grads[node] if node in keep else grads.pop(node)
+            for x, dx in zip(node.src, node.op.backward(dy)):
+                if x in reach:
+                    grads[x] = grads[x] + dx if x in grads else dx
+        if not retain_graph:
+            node.op, node.src = None, None
+
+    return [grads.get(x) for x in inputs]
+
+
+def jacobian(outputs: Sequence[Var], inputs: Sequence[Var], retain_graph: bool = False) -> Any:
+    # the (outputs x inputs) jacobian of scalar Vars, in a single sweep seeded with one-hot rows
+    outputs, inputs = _as_list(outputs), _as_list(inputs)
+    seeds = np.eye(len(outputs))
+    columns = grad(outputs, inputs, list(seeds), retain_graph=retain_graph)
+    jac = np.zeros((len(outputs), len(inputs)))
+    for k, column in enumerate(columns):
+        if column is not None:
+            jac[:, k] = column
+    return jac
+
+
+def per_sample_grads(losses: Sequence[Var], params: Sequence[Var], retain_graph: bool = False) -> Any:
+    # the (samples x params) matrix of d losses[s] / d params, in one reverse sweep over all the losses.
+    # A node reached from a single loss carries a (sample, cotangent) pair, it only turns into a
+    # {sample: cotangent} dict once a second sample reaches it. Leaf cotangents go straight into
+    # the row of their sample.
+    losses, params = _as_list(losses), _as_list(params)
+    column = {p: k for k, p in enumerate(params)}
+    rows = [[0.0] * len(params) for _ in losses]
+    grads: dict[Var, Any] = {}
+
+    def accumulate(x: Var, sample: int, dx: Any) -> None:
+        g = grads.get(x)
+        if g is None:
+            grads[x] = (sample, dx)
+        elif type(g) is dict:
+            g[sample] = g[sample] + dx if sample in g else dx
+        elif g[0] == sample:
+            grads[x] = (sample, g[1] + dx)
+        else:
+            grads[x] = {g[0]: g[1], sample: dx}
+
+    for s, y in enumerate(losses):
+        assert y.req_grad, "Node is not part of a autograd graph."
+        if y.src is None:
+            if y in column:
+                rows[s][column[y]] += 1.0
+        else:
+            accumulate(y, s, 1.0)
+
+    for node in reversed(_computed_node_dfs(*losses)):
+        g = grads.pop(node)
+        for sample, dy in (g.items() if type(g) is dict else (g,)):
+            row = rows[sample]
+            for x, dx in zip(node.src, node.op.backward(dy)):
+                if x.src is None:
+                    k = column.get(x)
+                    if k is not None:
+                        row[k] += dx
+                elif x.req_grad:
+                    accumulate(x, sample, dx)
+        if not retain_graph:
+            node.op, node.src = None, None
+
+    return np.array(rows)
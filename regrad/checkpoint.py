@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import math
+import threading
+from functools import partial
+from typing import Any, Callable, Mapping, Optional
+from . import variable
+from .forward import _Dual, _apply_forward
+from .lazy import LazyVar
+from .ops import Op
+from .variable import Var, _align, _apply, _apply_no_grad, _computed_node_dfs, _interpret
+
+
+class Checkpoint(Op):
+    __slots__ = ()
+
+    # forward runs fn without keeping its graph, backward rebuilds it from the saved inputs.
+    # Vars with req_grad that fn reads without taking them as arguments, such as parameters, are
+    # collected on the way, checkpoint() appends them to the inputs of the node.
+    def forward(self, *x: float, fn: Callable[..., Var], n_args: int) -> float:
+        x = x[:n_args]  # the captured Vars follow, fn reads them itself
+        captured = {}
+
+        def collect(op_: type(Op), var_args: tuple[Var, ...], op_args: Optional[Mapping[str, Any]]) -> Var:
+            for v in var_args:
+                if v.req_grad:
+                    captured[v] = None
+            return _apply_no_grad(op_, var_args, op_args)
+
+        with _interpret(collect):
+            y = fn(*[Var(xi) for xi in x]).val
+        self.save_to_cache(x, tuple(captured))
+        _last.op = self
+        return y
+
+    def backward(self, dy: float) -> tuple[float, ...]:
+        x, captured = self.retrieve_from_cache()
+        inputs = [Var(xi, req_grad=True) for xi in x]
+        y = self.op_args["fn"](*inputs)
+        return _segment_grads(y, dy, (*inputs, *captured))
+
+    def jvp(self, y: float, tangents: tuple[Any, ...]) -> Any:
+        # fn run again on inputs carrying their tangents, under the forward mode interpreter calling this
+        x, _ = self.retrieve_from_cache()
+        out = self.op_args["fn"](*[Var(xi) if t is None else _Dual(xi, t) for xi, t in zip(x, tangents)])
+        return out.tangent if isinstance(out, _Dual) else 0.0
+
+
+# the Checkpoint op whose forward ran last on this thread
+_last = threading.local()
+
+
+def _segment_grads(y: Var, dy: Any, boundary: tuple[Var, ...]) -> tuple[Any, ...]:
+    # the gradients of the boundary Vars from the graph of one rebuilt segment, which ends at them.
+    # They are returned rather than accumulated, the outer sweep carries them further.
+    # the post-order of _computed_node_dfs, nodes are visited when expanded so shared ones come
+    # after all of their consumers
+    stop = set(boundary)
+    queue: list[Var] = []
+    visited = set()
+    stack = [(y, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            queue.append(node)
+            continue
+        if node in visited:
+            continue
+        visited.add(node)
+        if node in stop or node.src is None:
+            continue
+        stack.append((node, True))
+        for p in reversed(node.src):
+            if p.req_grad and p not in visited:
+                stack.append((p, False))
+
+    grads = {y: dy}
+    for node in reversed(queue):
+        g = grads.pop(node)
+        for x, dx in zip(node.src, node.op.backward(g)):
+            if x.req_grad:
+                grads[x] = grads[x] + dx if x in grads else dx
+    return tuple(grads.get(v, 0.0) for v in boundary)
+
+
+def checkpoint(fn: Callable[..., Var], *args: float | Var) -> Var:
+    # fn(*args) as one node: its intermediates are dropped now and recomputed during backward
+    args = tuple(map(_align, args))
+    if variable._mode.interpreter is _apply_forward:
+        # forward mode keeps no graph, there is nothing to drop, and Vars fn captures carry their tangents
+        return fn(*args)
+    _last.op = None
+    y = _apply(Checkpoint, *args, op_args={"fn": fn, "n_args": len(args)})
+    if type(y) is LazyVar:
+        # the captured Vars are only known once forward has run, lazy() would defer it past the point
+        # where the node can still take them as inputs
+        y.val
+    op, _last.op = _last.op, None
+    # a graph node, not a value of no_grad, that reads Vars with req_grad from its closure
+    if type(op) is Checkpoint and type(y) in (Var, LazyVar) and op.retrieve_from_cache()[1]:
+        y.op, y.src, y.req_grad = op, (*args, *op.retrieve_from_cache()[1]), True
+    return y
+
+
+def _run_steps(step: Callable[[Var], Var], n_steps: int, x: Var) -> Var:
+    for _ in range(n_steps):
+        x = step(x)
+    return x
+
+
+def _segment_size(step: Callable[[Var], Var], x: Var, n_steps: int, budget: int) -> int:
+    # nodes per step from one probe step, then the longest segment whose checkpoints plus one
+    # recomputed segment stay within the budget of live nodes
+    probe = Var(x.val, req_grad=True)
+    nodes_per_step = max(1, len(_computed_node_dfs(step(probe))))
+    if n_steps * nodes_per_step <= budget:
+        return n_steps
+    for size in range(budget // nodes_per_step, 0, -1):
+        if math.ceil(n_steps / size) + size * nodes_per_step <= budget:
+            return size
+    raise ValueError(f"A budget of {budget} nodes is too small for {n_steps} steps "
+                     f"of {nodes_per_step} nodes each.")
+
+
+def checkpoint_sequential(
+        step: Callable[[Var], Var],
+        x: float | Var,
+        n_steps: int,
+        budget: Optional[int] = None
+) -> Var:
+    # step applied n_steps times, checkpointed in segments of sqrt(n_steps) steps,
+    # or in the longest segments that keep at most budget graph nodes alive
+    x = _align(x)
+    size = max(1, math.isqrt(n_steps)) if budget is None else _segment_size(step, x, n_steps, budget)
+    if size >= n_steps:
+        return _run_steps(step, n_steps, x)
+    for start in range(0, n_steps, size):
+        x = checkpoint(partial(_run_steps, step, min(size, n_steps - start)), x)
+    return x
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Sequence
+from .ops import *
+from .tape import Tape, trace
+from .variable import Var
+
+# forward and backward source per op, {0}, {1}, ... are the inputs, {y} the output and {dy} its gradient
+_forward_templates = {
+    Add: "{0} + {1}",
+    Sub: "{0} - {1}",
+    Mul: "{0} * {1}",
+    Div: "{0} / {1}",
+    Neg: "-{0}",
+    Exp: "exp({0})",
+    Log: "log({0})",
+    Sqrt: "sqrt({0})",
+    Sin: "sin({0})",
+    Cos: "cos({0})",
+    Tanh: "tanh({0})",
+    Relu: "{0} if {0} >= 0.0 else 0.0",
+}
+
+_backward_templates = {
+    Add: ("{dy}", "{dy}"),
+    Sub: ("{dy}", "-{dy}"),
+    Mul: ("{dy} * {1}", "{dy} * {0}"),
+    Div: ("{dy} / {1}", "-{dy} * {0} / ({1} * {1})"),
+    Neg: ("-{dy}",),
+    Exp: ("{dy} * {y}",),
+    Log: ("{dy} / {0}",),
+    Sqrt: ("{dy} * 0.5 / {y}",),
+    Sin: ("{dy} * cos({0})",),
+    Cos: ("-{dy} * sin({0})",),
+    Tanh: ("{dy} * (1 - {y} * {y})",),
+    Relu: ("({dy} if {0} >= 0.0 else 0.0)",),
+}
+
+_namespace = {name: getattr(math, name) for name in ("exp", "log", "sqrt", "sin", "cos", "tanh")}
+
+
+def _has_template(op: Op) -> bool:
+    return type(op) in _forward_templates or type(op) in (Pow, Sum, Dot)
+
+
+def _emit_forward(op: Op, x: list[str]) -> str:
+    if type(op) in _forward_templates:
+        return _forward_templates[type(op)].format(*x)
+    if type(op) is Pow:
+        return f"{x[0]} ** {op.op_args['power']!r}"
+    if type(op) is Sum:
+        return " + ".join(x)
+    n = len(x) // 2  # Dot
+    return " + ".join(f"{w} * {xi}" for w, xi in zip(x[:n], x[n:]))
+
+
+def _emit_backward(op: Op, x: list[str], y: str, dy: str) -> list[str]:
+    if type(op) in _backward_templates:
+        return [t.format(*x, y=y, dy=dy) for t in _backward_templates[type(op)]]
+    if type(op) is Pow:
+        power = repr(op.op_args["power"])
+        return [f"{dy} * {power} * {x[0]} ** ({power} - 1)"]
+    if type(op) is Sum:
+        return [dy] * len(x)
+    n = len(x) // 2  # Dot
+    return [f"{dy} * {xi}" for xi in x[n:]] + [f"{dy} * {w}" for w in x[:n]]
+
+
+class _Program:
+    # straight-line python for one traced graph, forward followed by the gradient of every leaf
+    def __init__(self, tape: Tape, arg_slots: dict[int, int]) -> None:
+        namespace = dict(_namespace)
+        self.captured: list[Var] = []
+        # argument position or captured leaf for every returned gradient
+        self.grad_targets: list[int | Var] = []
+
+        lines = ["def _compiled(_a, _c):"]
+        for var, slot in tape.leaves:
+            if slot in arg_slots:
+                lines.append(f"    v{slot} = _a[{arg_slots[slot]}]")
+            else:
+                lines.append(f"    v{slot} = _c[{len(self.captured)}].val")
+                self.captured.append(var)
+            if var.req_grad:
+                self.grad_targets.append(arg_slots.get(slot, var))
+
+        for k, (op, (fwd, _, src, out)) in enumerate(zip(tape.ops, tape.instructions)):
+            x = [f"v{i}" for i in src]
+            if _has_template(op):
+                expr = _emit_forward(op, x)
+            else:
+                # ops without a template are called as they are
+                namespace[f"_fwd{k}"] = fwd
+                expr = f"_fwd{k}({', '.join(x)})"
+            lines.append(f"    v{out} = {expr}")
+
+        root = tape.root_slot
+        grad_leaves = [slot for var, slot in tape.leaves if var.req_grad]
+        if tape.req_grad[root]:
+            lines += [f"    g{i} = 0.0" for i in range(tape.n_slots) if tape.req_grad[i] and i != root]
+            lines.append(f"    g{root} = 1.0")
+            for k in reversed(range(len(tape.instructions))):
+                op, (_, bwd, src, out) = tape.ops[k], tape.instructions[k]
+                if not tape.req_grad[out]:
+                    continue
+                if _has_template(op):
+                    dxs = _emit_backward(op, [f"v{i}" for i in src], f"v{out}", f"g{out}")
+                else:
+                    namespace[f"_bwd{k}"] = bwd
+                    lines.append(f"    _d = _bwd{k}(g{out})")
+                    dxs = [f"_d[{j}]" for j in range(len(src))]
+                lines += [f"    g{i} += {dx}" for i, dx in zip(src, dxs) if tape.req_grad[i]]
+        lines.append(f"    return v{root}, ({''.join(f'g{i}, ' for i in grad_leaves)})")
+
+        self.source = "\n".join(lines) + "\n"
+        exec(self.source, namespace)
+        self.fn = namespace["_compiled"]
+
+    def __call__(self, args: list[Var]) -> float:
+        val, grads = self.fn([v.val for v in args], self.captured)
+        for target, dy in zip(self.grad_targets, grads):
+            (args[target] if isinstance(target, int) else target).accumulate_grad(dy)
+        return val
+
+
+def _flatten(args: Sequence[Any]) -> tuple[list[Var], tuple]:
+    flat: list[Var] = []
+    key = []
+    for arg in args:
+        if isinstance(arg, (list, tuple)):
+            vs = [v if isinstance(v, Var) else Var(v) for v in arg]
+            key.append(tuple(v.req_grad for v in vs))
+            flat += vs
+        else:
+            v = arg if isinstance(arg, Var) else Var(arg)
+            key.append(v.req_grad)
+            flat.append(v)
+    return flat, tuple(key)
+
+
+class Compiled:
+    # Traces fn once per argument structure and runs the generated code afterwards. Python control
+    # flow on values inside fn is frozen at trace time, so fn should be a fixed expression of its inputs.
+    def __init__(self, fn: Callable[..., Var]) -> None:
+        self.fn = fn
+        self.programs: dict[tuple, _Program] = {}
+
+    def _trace(self, args: Sequence[Any], flat: list[Var]) -> _Program:
+        # fresh leaves stand in for the arguments, whatever graph these came from
+        leaves = [Var(v.val, req_grad=v.req_grad) for v in flat]
+        it = iter(leaves)
+        trace_args = [[next(it) for _ in arg] if isinstance(arg, (list, tuple)) else next(it) for arg in args]
+        with trace():
+            out = self.fn(*trace_args)
+        assert isinstance(out, Var), "A compiled function must return a single Var."
+        tape = Tape(out)
+        slot_of = {var: slot for var, slot in tape.leaves}
+        arg_slots = {slot_of[v]: pos for pos, v in enumerate(leaves) if v in slot_of}
+        return _Program(tape, arg_slots)
+
+    def __call__(self, *args: Any) -> float:
+        # the value of fn(*args), gradients are accumulated into the leaves that require one
+        flat, key = _flatten(args)
+        program = self.programs.get(key)
+        if program is None:
+            program = self.programs[key] = self._trace(args, flat)
+        return program(flat)
+
+
+def compile(fn: Callable[..., Var]) -> Compiled:
+    return Compiled(fn)
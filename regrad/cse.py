@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from typing import Any, Hashable, Iterator, Mapping, Optional
+from .ops import Op, Add, Mul, _ndarray
+from . import variable
+from .variable import Var, _apply_under
+
+# operand order doesn't change the result of these, so a + b and b + a share a node
+_commutative = (Add, Mul)
+
+
+class CSEStats:
+    def __init__(self) -> None:
+        self.nodes = 0
+        self.deduplicated = 0
+        self.constants = 0
+        self.constants_interned = 0
+
+    def __repr__(self) -> str:
+        return (f"CSEStats(nodes={self.nodes}, deduplicated={self.deduplicated}, "
+                f"constants={self.constants}, constants_interned={self.constants_interned})")
+
+
+class _Table:
+    def __init__(self, prev: Optional[variable.Interpreter], stats: CSEStats) -> None:
+        self.prev = prev
+        self.stats = stats
+        # values hold the inputs too, so the ids in a key can't be reused while the entry lives,
+        # and whether the node was linked into a graph, to tell when backward has freed it
+        self.nodes: dict[Hashable, tuple[Var, tuple[Var, ...], bool]] = {}
+        self.constants: dict[Hashable, Var] = {}
+
+    def apply(self, op_: type(Op), var_args: tuple[Var, ...], op_args: Optional[Mapping[str, Any]]) -> Var:
+        ids = tuple(map(id, var_args))
+        if op_ in _commutative:
+            ids = tuple(sorted(ids))
+        key = (op_, ids, None if op_args is None else tuple(sorted(op_args.items())))
+        try:
+            entry = self.nodes.get(key)
+        except TypeError:  # unhashable op arguments
+            return _apply_under(self.prev, op_, var_args, op_args)
+        if entry is not None and not (entry[2] and entry[0].op is None):
+            self.stats.deduplicated += 1
+            return entry[0]
+        node = _apply_under(self.prev, op_, var_args, op_args)
+        self.nodes[key] = (node, var_args, node.op is not None)
+        self.stats.nodes += 1
+        return node
+
+    def constant(self, v: Any) -> Var:
+        if isinstance(v, _ndarray):
+            return Var(v)
+        key = (type(v), repr(v))  # repr keeps 0.0 and -0.0 apart
+        node = self.constants.get(key)
+        if node is None:
+            node = self.constants[key] = Var(v)
+            self.stats.constants += 1
+        else:
+            self.stats.constants_interned += 1
+        return node
+
+
+@contextmanager
+def cse() -> Iterator[CSEStats]:
+    # graphs built in this block share every node with the same op, inputs and op arguments,
+    # python numbers become shared constants. Nodes freed by backward are built anew, but values
+    # are not tracked: changing the val of a leaf inside the block is not supported.
+    mode = variable._mode
+    table = _Table(mode.interpreter, CSEStats())
+    prev_interpreter, prev_constants = mode.interpreter, mode.constants
+    mode.interpreter, mode.constants = table.apply, table.constant
+    try:
+        yield table.stats
+    finally:
+        mode.interpreter, mode.constants = prev_interpreter, prev_constants
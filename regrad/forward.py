@@ -0,0 +1,48 @@
+from __future__ import annotations
+
+from typing import Any, Callable, Mapping, Optional, Sequence
+from .ops import Op
+from .variable import Var, _interpret
+
+
+class _Dual(Var):
+    # a value carrying its tangent, the directional derivative along the seeded inputs
+    __slots__ = ("tangent",)
+
+    def __init__(self, val: Any, tangent: Any) -> None:
+        super().__init__(val)
+        self.tangent = tangent
+
+
+def _apply_forward(op_: type(Op), var_args: tuple[Var, ...], op_args: Optional[Mapping[str, Any]]) -> Var:
+    op = op_() if op_args is None else op_(op_args)
+    vals = [t.val for t in var_args]
+    val = op.forward(*vals) if op_args is None else op.forward(*vals, **op_args)
+
+    tangents = tuple(x.tangent if isinstance(x, _Dual) else None for x in var_args)
+    if all(t is None for t in tangents):
+        return Var(val)
+    # by the tangent rule of the op, which is dropped afterwards
+    return _Dual(val, op.jvp(val, tangents))
+
+
+def _split(out: Any) -> tuple[Any, Any]:
+    if isinstance(out, _Dual):
+        return out.val, out.tangent
+    if isinstance(out, Var):
+        return out.val, 0.0
+    if isinstance(out, (list, tuple)):
+        pairs = [_split(o) for o in out]
+        return [v for v, _ in pairs], [t for _, t in pairs]
+    # a plain value, it doesn't depend on the primals
+    return out, 0.0
+
+
+def jvp(fn: Callable[..., Any], primals: Sequence[float | Var], tangents: Sequence[Any]) -> tuple[Any, Any]:
+    # forward mode: fn(*primals) and its jacobian-vector product in a single pass, without a graph.
+    # A tangent may be a numpy vector to push several directions through at once.
+    assert len(primals) == len(tangents), "Every primal needs a tangent."
+    inputs = [_Dual(p.val if isinstance(p, Var) else p, t) for p, t in zip(primals, tangents)]
+    with _interpret(_apply_forward):
+        out = fn(*inputs)
+    return _split(out)
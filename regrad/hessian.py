@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import math
+from types import SimpleNamespace
+from typing import Any, Optional, Sequence
+from .ops import _namespaces
+from .tape import Tape
+from .variable import Var
+
+
+class Dual:
+    # a number carrying its derivative along one direction. Run through an op's forward and backward,
+    # the tangent of every gradient is the matching row of the Hessian times that direction.
+    __slots__ = ("primal", "tangent")
+
+    def __init__(self, primal: Any, tangent: Any = 0.0) -> None:
+        self.primal = primal
+        self.tangent = tangent
+
+    def __repr__(self) -> str:
+        return f"Dual({self.primal}, {self.tangent})"
+
+    def __add__(self, o: Any) -> Dual:
+        if type(o) is Dual:
+            return _dual(self.primal + o.primal, self.tangent + o.tangent)
+        return _dual(self.primal + o, self.tangent)
+
+    __radd__ = __add__
+
+    def __sub__(self, o: Any) -> Dual:
+        if type(o) is Dual:
+            return _dual(self.primal - o.primal, self.tangent - o.tangent)
+        return _dual(self.primal - o, self.tangent)
+
+    def __rsub__(self, o: Any) -> Dual:
+        return _dual(o - self.primal, -self.tangent)
+
+    def __mul__(self, o: Any) -> Dual:
+        if type(o) is Dual:
+            return _dual(self.primal * o.primal, self.tangent * o.primal + self.primal * o.tangent)
+        return _dual(self.primal * o, self.tangent * o)
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, o: Any) -> Dual:
+        if type(o) is Dual:
+            y = self.primal / o.primal
+            return _dual(y, (self.tangent - y * o.tangent) / o.primal)
+        return _dual(self.primal / o, self.tangent / o)
+
+    def __rtruediv__(self, o: Any) -> Dual:
+        y = o / self.primal
+        return _dual(y, -y * self.tangent / self.primal)
+
+    def __neg__(self) -> Dual:
+        return _dual(-self.primal, -self.tangent)
+
+    def __pow__(self, power: float) -> Dual:
+        return _dual(self.primal ** power, power * self.primal ** (power - 1) * self.tangent)
+
+    # comparisons only look at the primal, as the branches of Relu do
+    def __eq__(self, o: Any) -> bool:
+        return self.primal == (o.primal if type(o) is Dual else o)
+
+    def __ge__(self, o: Any) -> bool:
+        return self.primal >= (o.primal if type(o) is Dual else o)
+
+    def __gt__(self, o: Any) -> bool:
+        return self.primal > (o.primal if type(o) is Dual else o)
+
+    def __le__(self, o: Any) -> bool:
+        return self.primal <= (o.primal if type(o) is Dual else o)
+
+    def __lt__(self, o: Any) -> bool:
+        return self.primal < (o.primal if type(o) is Dual else o)
+
+    __hash__ = None
+
+
+def _dual(primal: Any, tangent: Any, _new: Any = object.__new__) -> Dual:
+    # Dual() without the __init__ call, these are built by the hundred thousand
+    d = _new(Dual)
+    d.primal = primal
+    d.tangent = tangent
+    return d
+
+
+def _exp(x: Dual) -> Dual:
+    y = math.exp(x.primal)
+    return Dual(y, y * x.tangent)
+
+
+def _sqrt(x: Dual) -> Dual:
+    y = math.sqrt(x.primal)
+    return Dual(y, 0.5 * x.tangent / y)
+
+
+def _tanh(x: Dual) -> Dual:
+    y = math.tanh(x.primal)
+    return Dual(y, (1 - y * y) * x.tangent)
+
+
+# the math namespace the transcendental ops use for Dual values, registered by hvp
+_dual_math = SimpleNamespace(
+    exp=_exp,
+    log=lambda x: Dual(math.log(x.primal), x.tangent / x.primal),
+    sqrt=_sqrt,
+    sin=lambda x: Dual(math.sin(x.primal), math.cos(x.primal) * x.tangent),
+    cos=lambda x: Dual(math.cos(x.primal), -math.sin(x.primal) * x.tangent),
+    tanh=_tanh,
+)
+
+
+def hvp(
+        output: Var,
+        inputs: Sequence[Var],
+        v: Sequence[float],
+        tape: Optional[Tape] = None
+) -> tuple[list[float], list[float]]:
+    # (d output / d inputs, H v) with H the Hessian of output over inputs, exact and in one forward
+    # and one reverse sweep over Dual numbers seeded with v. Works on a tape of the graph, record it
+    # once and pass it in to evaluate several directions. Fresh ops are used, so neither the graph
+    # nor the grad of any leaf is touched.
+    assert len(inputs) == len(v), "Every input needs a direction."
+    if tape is None:
+        tape = Tape(output)
+    assert tape.req_grad[tape.root_slot], "Root is not part of a autograd graph."
+    direction = {x: d for x, d in zip(inputs, v)}
+    # Dual values only ever exist inside hvp, left registered for the next call and other threads
+    _namespaces.setdefault(Dual, _dual_math)
+
+    vals = list(tape._vals)
+    for var, i in tape.leaves:
+        vals[i] = Dual(var.val, direction[var]) if var in direction else var.val
+    req_grad = tape.req_grad
+    backward = []
+    for op, (_, _, src, out) in zip(tape.ops, tape.instructions):
+        op = op.copy()
+        vals[out] = op.forward(*[vals[i] for i in src], **op.op_args)
+        if req_grad[out]:
+            backward.append((op.backward, src, out))
+
+    grads: list[Any] = [0.0] * tape.n_slots
+    grads[tape.root_slot] = 1.0
+    for bwd, src, out in reversed(backward):
+        for i, dx in zip(src, bwd(grads[out])):
+            grads[i] += dx
+
+    slots = dict(tape.leaves)
+    g, hv = [], []
+    for x in inputs:
+        dx = grads[slots[x]] if x in slots else 0.0
+        if isinstance(dx, Dual):
+            g.append(dx.primal)
+            hv.append(dx.tangent)
+        else:
+            g.append(dx)
+            hv.append(0.0)
+    return g, hv
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+from typing import Any, ContextManager, Mapping, Optional
+from . import variable
+from .ops import Op
+from .variable import Var, _interpret
+
+_PENDING = object()
+_QUEUED = object()
+
+
+class LazyVar(Var):
+    # a node whose value is only computed when read, together with the pending nodes it depends on
+    __slots__ = ("_val",)
+
+    def __init__(self, op: Op, src: tuple[Var, ...], req_grad: bool) -> None:
+        self._val = _PENDING
+        self.op = op
+        self.src = src
+        self.req_grad = req_grad
+        self.grad = None
+
+    @property
+    def val(self) -> Any:
+        if self._val is _PENDING:
+            _materialize(self)
+        return self._val
+
+    @val.setter
+    def val(self, v: Any) -> None:
+        self._val = v
+
+    def backward(self, dy: Optional[Any] = None, retain_graph: bool = False) -> None:
+        # the op caches are only filled once the forward values have been computed
+        if self._val is _PENDING:
+            _materialize(self)
+        super().backward(dy, retain_graph)
+
+
+def _materialize(root: LazyVar) -> None:
+    # iterative post-order over the pending nodes below root, marked queued on expansion, then
+    # computed once each in that order
+    order = []
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
+            continue
+        if node._val is not _PENDING:
+            continue
+        node._val = _QUEUED
+        stack.append((node, True))
+        for p in node.src:
+            if type(p) is LazyVar and p._val is _PENDING:
+                stack.append((p, False))
+
+    tracing = variable._mode.tracing
+    try:
+        for node in order:
+            op = node.op
+            node._val = op.forward(*[p._val if type(p) is LazyVar else p.val for p in node.src], **op.op_args)
+            if not node.req_grad and not tracing:
+                # a constant, no longer needs its inputs once it holds a value
+                node.op, node.src = None, None
+    finally:
+        # after a failing forward the nodes not computed yet are pending again, the next read raises anew
+        for node in order:
+            if node._val is _QUEUED:
+                node._val = _PENDING
+
+
+def _apply_lazy(op_: type(Op), var_args: tuple[Var, ...], op_args: Optional[Mapping[str, Any]]) -> Var:
+    op = op_() if op_args is None else op_(op_args)
+    return LazyVar(op, var_args, any(t.req_grad for t in var_args))
+
+
+def lazy() -> ContextManager[None]:
+    # operators only record the graph, values are computed on the first read of .val or on backward
+    return _interpret(_apply_lazy)
@@ -1,10 +1,37 @@
 import math
+from operator import mul
 from abc import ABC, abstractmethod
-from typing import Any
+from types import MappingProxyType
+from typing import Any, Mapping
+
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for batched values
+    np = None
+
+_ndarray = () if np is None else np.ndarray
+# math namespace per value type: python scalars use math, batched values the numpy ufuncs
+_namespaces: dict[type, Any] = {} if np is None else {np.ndarray: np}
+
+# shared by every op that takes no arguments, so no per-node dict is allocated
+NO_ARGS: Mapping[str, Any] = MappingProxyType({})
+
+
+def _lib(x: Any) -> Any:
+    return _namespaces.get(type(x), math)
+
+
+def _sum_to(dy: Any, shape: tuple[int, ...]) -> Any:
+    # reduce a broadcast gradient back to the shape of its input
+    dy = dy.sum(axis=tuple(range(dy.ndim - len(shape))))
+    axes = tuple(i for i, n in enumerate(shape) if n == 1 and dy.shape[i] != 1)
+    return dy.sum(axis=axes, keepdims=True) if axes else dy
 
 
 class Op(ABC):
-    def __init__(self, op_args: Any) -> None:
+    __slots__ = ("op_args", "_cache")
+
+    def __init__(self, op_args: Mapping[str, Any] = NO_ARGS) -> None:
         self.op_args = op_args  # graph
         self._cache: Any = None
 
@@ -12,13 +39,17 @@ class Op(ABC):
     def name(self) -> str:
         return self.__class__.__name__
 
+    def copy(self) -> "Op":
+        # a fresh instance with the same arguments and its own cache
+        return type(self)(self.op_args)
+
     def save_to_cache(self, *args: Any):
         self._cache = args
 
     def retrieve_from_cache(self) -> tuple[Any, ...]:
+        # kept for repeated backward passes, it is freed together with the op
         assert self._cache is not None
-        values, self._cache = self._cache, None
-        return values
+        return self._cache
 
     @abstractmethod
     def forward(self, *x: float, **kwargs: float) -> float:
@@ -28,8 +59,37 @@ class Op(ABC):
     def backward(self, dy: float) -> tuple[float, ...]:
         raise NotImplementedError("Subclasses must implement the backward method.")
 
+    def jvp(self, y: Any, tangents: tuple[Any, ...]) -> Any:
+        # forward mode: the tangent of the output y from those of the inputs, None for constant ones.
+        # The partials come from backward seeded with ones, which holds for scalar and elementwise ops.
+        partials = self.backward(np.ones_like(y) if isinstance(y, _ndarray) else 1.0)
+        tangent = None
+        for dx, t in zip(partials, tangents):
+            if t is not None:
+                dt = dx * t
+                tangent = dt if tangent is None else tangent + dt
+        return tangent
+
+
+def _discard_cache(self: Op, *args: Any) -> None:
+    pass
+
+
+_inference_ops: dict[type, Op] = {}
+
+
+def _inference_op(op_: type[Op]) -> Op:
+    # one shared, cache-less instance per op class, used to compute values without a graph
+    op = _inference_ops.get(op_)
+    if op is None:
+        cls = type(op_.__name__, (op_,), {"__slots__": (), "save_to_cache": _discard_cache})
+        op = _inference_ops[op_] = cls()
+    return op
+
 
 class Add(Op):
+    __slots__ = ()
+
     def forward(self, x1: float, x2: float) -> float:
         y = x1 + x2
         return y
@@ -41,6 +101,8 @@ class Add(Op):
 
 
 class Sub(Op):
+    __slots__ = ()
+
     def forward(self, x1: float, x2: float) -> float:
         y = x1 - x2
         return y
@@ -52,6 +114,8 @@ class Sub(Op):
 
 
 class Mul(Op):
+    __slots__ = ()
+
     def forward(self, x1: float, x2: float) -> float:
         y = x1 * x2
         self.save_to_cache(x1, x2)
@@ -65,6 +129,8 @@ class Mul(Op):
 
 
 class Div(Op):
+    __slots__ = ()
+
     def forward(self, x1: float, x2: float) -> float:
         y = x1 / x2
         self.save_to_cache(x1, x2)
@@ -78,6 +144,8 @@ class Div(Op):
 
 
 class Neg(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
         y = -x
         return y
@@ -88,6 +156,8 @@ class Neg(Op):
 
 
 class Pow(Op):
+    __slots__ = ()
+
     def forward(self, x: float, *, power: float) -> float:
         y = x ** power
         self.save_to_cache(x, power)
@@ -100,8 +170,10 @@ class Pow(Op):
 
 
 class Exp(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
-        y = math.exp(x)
+        y = _lib(x).exp(x)
         self.save_to_cache(y)
         return y
 
@@ -112,8 +184,10 @@ class Exp(Op):
 
 
 class Log(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
-        y = math.log(x)
+        y = _lib(x).log(x)
         self.save_to_cache(x)
         return y
 
@@ -124,8 +198,10 @@ class Log(Op):
 
 
 class Sqrt(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
-        y = math.sqrt(x)
+        y = _lib(x).sqrt(x)
         self.save_to_cache(y)
         return y
 
@@ -136,32 +212,38 @@ class Sqrt(Op):
 
 
 class Sin(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
-        y = math.sin(x)
+        y = _lib(x).sin(x)
         self.save_to_cache(x)
         return y
 
     def backward(self, dy: float) -> tuple[float, ...]:
         (x,) = self.retrieve_from_cache()
-        dx = dy * math.cos(x)
+        dx = dy * _lib(x).cos(x)
         return tuple((dx,))
 
 
 class Cos(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
-        y = math.cos(x)
+        y = _lib(x).cos(x)
         self.save_to_cache(x)
         return y
 
     def backward(self, dy: float) -> tuple[float, ...]:
         (x,) = self.retrieve_from_cache()
-        dx = -dy * math.sin(x)
+        dx = -dy * _lib(x).sin(x)
         return tuple((dx,))
 
 
 class Tanh(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
-        y = math.tanh(x)
+        y = _lib(x).tanh(x)
         self.save_to_cache(y)
         return y
 
@@ -172,12 +254,98 @@ class Tanh(Op):
 
 
 class Relu(Op):
+    __slots__ = ()
+
     def forward(self, x: float) -> float:
-        y = x if x >= 0.0 else 0.0
-        self.save_to_cache(y == x)
+        if isinstance(x, _ndarray):
+            mask = x >= 0.0
+            y = np.where(mask, x, 0.0)
+        else:
+            y = x if x >= 0.0 else 0.0
+            mask = y == x
+        self.save_to_cache(mask)
         return y
 
     def backward(self, dy: float) -> tuple[float, ...]:
         (mask,) = self.retrieve_from_cache()
         dx = dy * mask
         return tuple((dx,))
+
+
+class Sum(Op):
+    __slots__ = ()
+
+    def forward(self, *x: float) -> float:
+        y = sum(x)
+        self.save_to_cache(len(x))
+        return y
+
+    def backward(self, dy: float) -> tuple[float, ...]:
+        (n,) = self.retrieve_from_cache()
+        return (dy,) * n
+
+
+class Dot(Op):
+    __slots__ = ()
+
+    # inputs are w_1..w_n followed by x_1..x_n, y = w_1 * x_1 + ... + w_n * x_n
+    def forward(self, *x: float) -> float:
+        n = len(x) // 2
+        y = sum(map(mul, x[:n], x[n:]))
+        self.save_to_cache(x)
+        return y
+
+    def backward(self, dy: float) -> tuple[float, ...]:
+        (x,) = self.retrieve_from_cache()
+        n = len(x) // 2
+        dw = [dy * xi for xi in x[n:]]
+        dx = [dy * wi for wi in x[:n]]
+        return tuple(dw + dx)
+
+
+class Linear(Op):
+    __slots__ = ()
+
+    # x of shape (..., n_in), w of shape (n_out, n_in), b of shape (n_out,)
+    def forward(self, x: Any, w: Any, b: Any) -> Any:
+        y = x @ w.T + b
+        self.save_to_cache(x, w)
+        return y
+
+    def backward(self, dy: Any) -> tuple[Any, ...]:
+        x, w = self.retrieve_from_cache()
+        dy_2d = dy.reshape(-1, dy.shape[-1])
+        dx = dy @ w
+        dw = dy_2d.T @ x.reshape(-1, x.shape[-1])
+        db = dy_2d.sum(axis=0)
+        return tuple((dx, dw, db))
+
+    def jvp(self, y: Any, tangents: tuple[Any, ...]) -> Any:
+        x, w = self.retrieve_from_cache()
+        tx, tw, tb = tangents
+        tangent = np.zeros_like(y)
+        if tx is not None:
+            tangent += tx @ w.T
+        if tw is not None:
+            tangent += x @ tw.T
+        if tb is not None:
+            tangent += tb
+        return tangent
+
+
+class ReduceSum(Op):
+    __slots__ = ()
+
+    def forward(self, x: Any) -> float:
+        y = x.sum().item()
+        self.save_to_cache(x.shape)
+        return y
+
+    def backward(self, dy: float) -> tuple[Any, ...]:
+        (shape,) = self.retrieve_from_cache()
+        dx = np.full(shape, dy)
+        return tuple((dx,))
+
+    def jvp(self, y: float, tangents: tuple[Any, ...]) -> float:
+        (tx,) = tangents
+        return tx.sum().item()
@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+import time
+from typing import Any, Mapping, Optional
+from . import variable
+from .ops import Op
+from .variable import Var, _apply_under, _computed_node_dfs, _sweep
+
+
+class OpStats:
+    __slots__ = ("calls", "nodes", "forward_time", "backward_calls", "backward_time")
+
+    def __init__(self) -> None:
+        self.calls = 0
+        self.nodes = 0  # results linked into a graph, the rest were plain values
+        self.forward_time = 0.0
+        self.backward_calls = 0
+        self.backward_time = 0.0
+
+    @property
+    def total_time(self) -> float:
+        return self.forward_time + self.backward_time
+
+
+class Profiler:
+    # Times every _apply and every op backward of Var.backward on this thread, per op class.
+    # It wraps the interpreter active when entered (enter it inside no_grad() to profile inference),
+    # and when no profile is active the only cost left is one check per Var.backward call.
+
+    def __init__(self) -> None:
+        self.stats: dict[str, OpStats] = {}
+        self.queue_sizes: list[int] = []
+        self.sort_time = 0.0
+        self._prev_interpreter = None
+        self._prev_profiler = None
+
+    def __enter__(self) -> Profiler:
+        mode = variable._mode
+        self._prev_interpreter, self._prev_profiler = mode.interpreter, mode.profiler
+        mode.interpreter, mode.profiler = self._apply, self
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        mode = variable._mode
+        mode.interpreter, mode.profiler = self._prev_interpreter, self._prev_profiler
+
+    def _op_stats(self, name: str) -> OpStats:
+        stats = self.stats.get(name)
+        if stats is None:
+            stats = self.stats[name] = OpStats()
+        return stats
+
+    def _apply(self, op_: type(Op), var_args: tuple[Var, ...], op_args: Optional[Mapping[str, Any]]) -> Var:
+        start = time.perf_counter()
+        out = _apply_under(self._prev_interpreter, op_, var_args, op_args)
+        elapsed = time.perf_counter() - start
+        stats = self._op_stats(op_.__name__)
+        stats.calls += 1
+        stats.forward_time += elapsed
+        if out.op is not None:
+            stats.nodes += 1
+        return out
+
+    def backward(self, root: Var, retain_graph: bool) -> None:
+        # the sweep of Var.backward, timed per op
+        start = time.perf_counter()
+        node_queue = _computed_node_dfs(root)
+        self.sort_time += time.perf_counter() - start
+        self.queue_sizes.append(len(node_queue))
+        _sweep(node_queue, retain_graph, self._timed_backward)
+
+    def _timed_backward(self, op: Op, dy: Any) -> tuple[Any, ...]:
+        start = time.perf_counter()
+        grads = op.backward(dy)
+        elapsed = time.perf_counter() - start
+        stats = self._op_stats(op.name)
+        stats.backward_calls += 1
+        stats.backward_time += elapsed
+        return grads
+
+    def table(self, sort_by: str = "total_time") -> str:
+        rows = sorted(self.stats.items(), key=lambda item: getattr(item[1], sort_by), reverse=True)
+        lines = [f"{'op':<12s} {'calls':>9s} {'nodes':>9s} {'forward ms':>11s} {'backward':>9s} "
+                 f"{'backward ms':>12s} {'total ms':>10s}"]
+        for name, s in rows:
+            lines.append(f"{name:<12s} {s.calls:>9d} {s.nodes:>9d} {s.forward_time * 1e3:>11.3f} "
+                         f"{s.backward_calls:>9d} {s.backward_time * 1e3:>12.3f} {s.total_time * 1e3:>10.3f}")
+        lines.append(f"{len(self.queue_sizes)} backward passes, {sum(self.queue_sizes)} queued nodes, "
+                     f"topological sort {self.sort_time * 1e3:.3f} ms")
+        return "\n".join(lines)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "ops": {name: {k: getattr(s, k) for k in OpStats.__slots__} for name, s in self.stats.items()},
+            "queue_sizes": self.queue_sizes,
+            "sort_time": self.sort_time,
+        }
+
+    def to_json(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def folded(self) -> str:
+        # "phase;op microseconds" lines, the folded stack format of flamegraph.pl and speedscope
+        lines = []
+        for name, s in self.stats.items():
+            if s.forward_time > 0:
+                lines.append(f"forward;{name} {round(s.forward_time * 1e6)}")
+            if s.backward_time > 0:
+                lines.append(f"backward;{name} {round(s.backward_time * 1e6)}")
+        if self.sort_time > 0:
+            lines.append(f"backward;topological_sort {round(self.sort_time * 1e6)}")
+        return "\n".join(lines) + "\n"
+
+
+def profile() -> Profiler:
+    # with profile() as prof: ...; print(prof.table())
+    return Profiler()
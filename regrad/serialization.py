@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import gc
+import json
+import mmap
+from typing import Any, Optional
+from . import ops
+from .ops import Op, np, _ndarray
+from .tape import _graph_nodes
+from .variable import Var
+
+# "\x93REGRAD" and a version byte, then a little-endian uint32 header length and a JSON header.
+# The arrays follow as raw bytes, each aligned to _ALIGN so that they map straight into numpy.
+_MAGIC = b"\x93REGRAD\x01"
+_ALIGN = 64
+
+# every op class of regrad.ops, by name, for rebuilding loaded graphs
+_op_classes = {name: cls for name, cls in vars(ops).items()
+               if isinstance(cls, type) and issubclass(cls, Op) and cls is not Op}
+
+
+def _pad(n: int) -> int:
+    return -n % _ALIGN
+
+
+def save_arrays(path: str, arrays: dict[str, Any], meta: Optional[dict[str, Any]] = None) -> None:
+    # one file of named arrays plus a JSON-able meta dict
+    assert np is not None, "Saving arrays requires numpy."
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    entries = {}
+    offset = 0
+    for name, a in arrays.items():
+        entries[name] = {"dtype": a.dtype.str, "shape": list(a.shape), "offset": offset}
+        offset += a.nbytes + _pad(a.nbytes)
+    header = json.dumps({"arrays": entries, "meta": meta or {}}).encode()
+    start = len(_MAGIC) + 4 + len(header)
+    with open(path, "wb") as f:
+        f.write(_MAGIC)
+        f.write(len(header).to_bytes(4, "little"))
+        f.write(header)
+        f.write(bytes(_pad(start)))
+        for a in arrays.values():
+            f.write(memoryview(a).cast("B"))
+            f.write(bytes(_pad(a.nbytes)))
+
+
+def load_arrays(path: str, mmap_mode: bool = True) -> tuple[dict[str, Any], dict[str, Any]]:
+    # (arrays, meta), with mmap_mode the arrays are read-only views of the mapped file, no data is copied
+    assert np is not None, "Loading arrays requires numpy."
+    with open(path, "rb") as f:
+        if mmap_mode:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            buffer = f.read()
+    assert buffer[:len(_MAGIC)] == _MAGIC, f"{path} is not a regrad array file."
+    size = int.from_bytes(buffer[len(_MAGIC):len(_MAGIC) + 4], "little")
+    start = len(_MAGIC) + 4
+    header = json.loads(bytes(buffer[start:start + size]))
+    start += size + _pad(start + size)
+    arrays = {}
+    for name, entry in header["arrays"].items():
+        dtype = np.dtype(entry["dtype"])
+        count = int(np.prod(entry["shape"], dtype=np.int64))
+        a = np.frombuffer(buffer, dtype=dtype, count=count, offset=start + entry["offset"])
+        arrays[name] = a.reshape(entry["shape"])
+    return arrays, header["meta"]
+
+
+class Graph:
+    # a saved graph as columns over its nodes in topological order, the root last:
+    #   opcode       index into op_names, -1 for leaves and constants
+    #   src_offsets  node i reads the nodes src_index[src_offsets[i]:src_offsets[i + 1]]
+    #   value        the value of scalar nodes, NaN for array valued ones, whose data is in tensors
+    #   req_grad     0 or 1
+    #   args[key]    (nodes, values) of the ops that take the argument key, such as the power of Pow
+    def __init__(self, arrays: dict[str, Any], meta: dict[str, Any]) -> None:
+        self.op_names: list[str] = meta["ops"]
+        self.opcode = arrays["opcode"]
+        self.src_offsets = arrays["src_offsets"]
+        self.src_index = arrays["src_index"]
+        self.value = arrays["value"]
+        self.req_grad = arrays["req_grad"]
+        self.args = {key: (arrays[f"arg:{key}:node"], arrays[f"arg:{key}:value"]) for key in meta["args"]}
+        self._int_args = set(meta["int_args"])
+        self._args_by_node: Optional[dict[int, dict[str, Any]]] = None
+        self._tensor_nodes = arrays["tensor_node"]
+        self._tensor_offsets = arrays["tensor_offsets"]
+        self._tensor_data = arrays["tensor_data"]
+        self._tensor_shapes = meta["tensor_shapes"]
+
+    def __len__(self) -> int:
+        return len(self.opcode)
+
+    def op_name(self, i: int) -> Optional[str]:
+        code = self.opcode[i]
+        return None if code < 0 else self.op_names[code]
+
+    def sources(self, i: int) -> Any:
+        return self.src_index[self.src_offsets[i]:self.src_offsets[i + 1]]
+
+    def tensors(self) -> dict[int, Any]:
+        # node index -> array value, views of the file
+        return {int(i): self._tensor_data[self._tensor_offsets[k]:self._tensor_offsets[k + 1]].reshape(shape)
+                for k, (i, shape) in enumerate(zip(self._tensor_nodes, self._tensor_shapes))}
+
+    def op_args(self, i: int) -> dict[str, Any]:
+        return self._node_args().get(i, {})
+
+    def _node_args(self) -> dict[int, dict[str, Any]]:
+        # node index -> op_args, for the nodes that have any
+        if self._args_by_node is None:
+            self._args_by_node = {}
+            for key, (nodes, values) in self.args.items():
+                cast = int if key in self._int_args else float
+                for node, v in zip(nodes.tolist(), values.tolist()):
+                    self._args_by_node.setdefault(node, {})[key] = cast(v)
+        return self._args_by_node
+
+    def to_vars(self) -> list[Var]:
+        # rebuilds the graph as Vars, indexed like the columns so the root is last, running every op
+        # forward so that backward can be called on it. Leaves come back as plain Vars with the saved values.
+        tensors = self.tensors()
+        values = self.value.tolist()
+        opcode = self.opcode.tolist()
+        offsets = self.src_offsets.tolist()
+        src_index = self.src_index.tolist()
+        req_grad = self.req_grad.tolist()
+        classes = [_op_classes[name] for name in self.op_names]
+        args_by_node = self._node_args()
+        nodes: list[Var] = []
+        # the graph holds no cycles, the collector would only walk it again and again while it grows
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            for i, code in enumerate(opcode):
+                if code < 0:
+                    val = tensors[i].copy() if i in tensors else values[i]
+                    nodes.append(Var(val, req_grad=req_grad[i] == 1))
+                    continue
+                src = tuple([nodes[j] for j in src_index[offsets[i]:offsets[i + 1]]])
+                op_args = args_by_node.get(i)
+                if op_args is None:
+                    op = classes[code]()
+                    val = op.forward(*[x.val for x in src])
+                else:
+                    op = classes[code](op_args)
+                    val = op.forward(*[x.val for x in src], **op_args)
+                nodes.append(Var(val, op, src, req_grad[i] == 1))
+        finally:
+            if enabled:
+                gc.enable()
+        return nodes
+
+
+def save_graph(root: Var, path: str) -> None:
+    # every node reachable from root, record with regrad.trace to keep constant subgraphs
+    assert np is not None, "Saving graphs requires numpy."
+    nodes = _graph_nodes(root)
+    index = {node: i for i, node in enumerate(nodes)}
+    op_names: dict[str, int] = {}
+    opcode = np.full(len(nodes), -1, dtype=np.int16)
+    value = np.full(len(nodes), np.nan)
+    req_grad = np.zeros(len(nodes), dtype=np.uint8)
+    src_offsets = np.zeros(len(nodes) + 1, dtype=np.int64)
+    src_index: list[int] = []
+    args: dict[str, tuple[list[int], list[Any]]] = {}
+    int_args = set()
+    tensor_node, tensor_data, tensor_shapes = [], [], []
+
+    for i, node in enumerate(nodes):
+        if node.op is not None:
+            name = node.op.name
+            assert _op_classes.get(name) is type(node.op), f"{name} can't be saved."
+            opcode[i] = op_names.setdefault(name, len(op_names))
+            src_index.extend(index[p] for p in node.src)
+            for key, v in node.op.op_args.items():
+                assert isinstance(v, (int, float, np.number)), f"Argument {key} of {name} is not a number."
+                if key not in args:
+                    args[key] = ([], [])
+                    int_args.add(key)
+                args[key][0].append(i)
+                args[key][1].append(v)
+                if not isinstance(v, (int, np.integer)):
+                    int_args.discard(key)
+        src_offsets[i + 1] = len(src_index)
+        req_grad[i] = node.req_grad
+        if isinstance(node.val, _ndarray):
+            tensor_node.append(i)
+            tensor_data.append(node.val.astype(np.float64).ravel())
+            tensor_shapes.append(list(node.val.shape))
+        else:
+            value[i] = node.val
+
+    tensor_offsets = np.cumsum([0] + [len(t) for t in tensor_data], dtype=np.int64)
+    index_type = np.int32 if len(nodes) < 2 ** 31 else np.int64
+    arrays = {
+        "opcode": opcode,
+        "src_offsets": src_offsets,
+        "src_index": np.array(src_index, dtype=index_type),
+        "value": value,
+        "req_grad": req_grad,
+        "tensor_node": np.array(tensor_node, dtype=np.int64),
+        "tensor_offsets": tensor_offsets,
+        "tensor_data": np.concatenate(tensor_data) if tensor_data else np.zeros(0),
+    }
+    for key, (arg_nodes, arg_values) in args.items():
+        arrays[f"arg:{key}:node"] = np.array(arg_nodes, dtype=index_type)
+        arrays[f"arg:{key}:value"] = np.array(arg_values, dtype=np.float64)
+    meta = {"format": "regrad-graph", "ops": list(op_names), "args": list(args), "int_args": sorted(int_args),
+            "tensor_shapes": tensor_shapes}
+    save_arrays(path, arrays, meta)
+
+
+def load_graph(path: str, mmap_mode: bool = True) -> Graph:
+    arrays, meta = load_arrays(path, mmap_mode)
+    assert meta.get("format") == "regrad-graph", f"{path} does not hold a graph."
+    return Graph(arrays, meta)
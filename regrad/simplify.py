@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from typing import Any, Iterable, Optional
+from .ops import *
+from .ops import _inference_op
+from .tape import Tape
+from .variable import Var
+
+
+class Fused(Op):
+    __slots__ = ()
+
+    # a chain of unary ops replayed as a single instruction
+    def forward(self, x: float, *, stages: tuple[Op, ...]) -> float:
+        for op in stages:
+            x = op.forward(x, **op.op_args) if op.op_args else op.forward(x)
+        return x
+
+    def backward(self, dy: float) -> tuple[float, ...]:
+        for op in reversed(self.op_args["stages"]):
+            (dy,) = op.backward(dy)
+        return tuple((dy,))
+
+    def copy(self) -> Fused:
+        # the stages hold the caches, they are copied as well
+        return Fused({"stages": tuple(op.copy() for op in self.op_args["stages"])})
+
+
+_unary = (Neg, Pow, Exp, Log, Sqrt, Sin, Cos, Tanh, Relu, Fused)
+
+
+class _Rewriter:
+    def __init__(self, tape: Tape, inputs: set[Var]) -> None:
+        n = tape.n_slots
+        self.vals = list(tape._vals)
+        self.const = [False] * n
+        self.req_grad = [False] * n
+        self.alias = list(range(n))
+        self.ops: list[tuple[Op, tuple[int, ...], int]] = []
+        self.producer: dict[int, tuple[Op, tuple[int, ...]]] = {}
+        self.leaves: list[tuple[Var, int]] = []
+        for var, slot in tape.leaves:
+            if var.req_grad or var in inputs:
+                self.leaves.append((var, slot))
+                self.req_grad[slot] = var.req_grad
+            else:
+                # every other leaf is frozen at its current value
+                self.const[slot] = True
+                self.vals[slot] = var.val
+
+    def is_const(self, i: int, value: float) -> bool:
+        return self.const[i] and isinstance(self.vals[i], (int, float)) and self.vals[i] == value
+
+    def new_slot(self) -> int:
+        self.vals.append(0.0)
+        self.const.append(False)
+        self.req_grad.append(False)
+        self.alias.append(len(self.alias))
+        return len(self.vals) - 1
+
+    def set_const(self, out: int, value: Any) -> None:
+        self.const[out], self.vals[out] = True, value
+
+    def emit(self, op: Op, src: tuple[int, ...], out: int) -> None:
+        self.ops.append((op, src, out))
+        self.producer[out] = (op, src)
+        self.req_grad[out] = any(self.req_grad[i] for i in src)
+
+    def rewrite(self, op: Op, src: tuple[int, ...], out: int) -> None:
+        src = tuple(self.alias[i] for i in src)
+        op_type, is_const = type(op), self.is_const
+        if all(self.const[i] for i in src):
+            self.set_const(out, _inference_op(op_type).forward(*[self.vals[i] for i in src], **op.op_args))
+        elif op_type is Add and is_const(src[1], 0):
+            self.alias[out] = src[0]
+        elif op_type is Add and is_const(src[0], 0):
+            self.alias[out] = src[1]
+        elif op_type in (Sub, Div) and is_const(src[1], 0 if op_type is Sub else 1):
+            self.alias[out] = src[0]
+        elif op_type is Sub and is_const(src[0], 0):
+            self.emit(Neg(), src[1:], out)
+        elif op_type is Mul and (is_const(src[0], 0) or is_const(src[1], 0)):
+            self.set_const(out, 0.0)
+        elif op_type is Mul and (is_const(src[0], 1) or is_const(src[1], 1)):
+            self.alias[out] = src[1] if is_const(src[0], 1) else src[0]
+        elif op_type in (Mul, Div) and is_const(src[1], -1):
+            self.emit(Neg(), src[:1], out)
+        elif op_type is Mul and is_const(src[0], -1):
+            self.emit(Neg(), src[1:], out)
+        elif op_type is Neg and src[0] in self.producer and type(self.producer[src[0]][0]) is Neg:
+            self.alias[out] = self.producer[src[0]][1][0]
+        elif op_type is Pow and op.op_args["power"] in (0, 1, 2, 3):
+            self.rewrite_pow(op.op_args["power"], src[0], out)
+        elif op_type is Sum:
+            self.rewrite_sum(src, out)
+        elif op_type is Dot:
+            self.rewrite_dot(src, out)
+        else:
+            self.emit(op.copy(), src, out)
+
+    def rewrite_pow(self, power: float, x: int, out: int) -> None:
+        # strength reduction of small integer powers
+        if power == 0:
+            self.set_const(out, 1.0)
+        elif power == 1:
+            self.alias[out] = x
+        elif power == 2:
+            self.emit(Mul(), (x, x), out)
+        else:
+            square = self.new_slot()
+            self.emit(Mul(), (x, x), square)
+            self.emit(Mul(), (square, x), out)
+
+    def rewrite_sum(self, src: tuple[int, ...], out: int) -> None:
+        terms = tuple(i for i in src if not self.const[i])
+        total = sum(self.vals[i] for i in src if self.const[i])
+        if not (isinstance(total, (int, float)) and total == 0):
+            c = self.new_slot()
+            self.set_const(c, total)
+            terms += (c,)
+        if len(terms) == 1:
+            self.alias[out] = terms[0]
+        else:
+            self.emit(Sum(), terms, out)
+
+    def rewrite_dot(self, src: tuple[int, ...], out: int) -> None:
+        n = len(src) // 2
+        pairs = [(w, x) for w, x in zip(src[:n], src[n:]) if not (self.is_const(w, 0) or self.is_const(x, 0))]
+        if len(pairs) == 0:
+            self.set_const(out, 0.0)
+        else:
+            ws, xs = zip(*pairs)
+            self.emit(Dot(), ws + xs, out)
+
+
+def _stages(op: Op) -> tuple[Op, ...]:
+    return op.op_args["stages"] if isinstance(op, Fused) else (op,)
+
+
+def _fuse_unary_chains(ops: list[tuple[Op, tuple[int, ...], int]], root: int) -> list[tuple[Op, tuple[int, ...], int]]:
+    # a unary op whose input comes from another unary op, used nowhere else, joins its chain
+    consumers: dict[int, int] = {}
+    for _, src, _ in ops:
+        for i in src:
+            consumers[i] = consumers.get(i, 0) + 1
+
+    fused: list[Optional[tuple[Op, tuple[int, ...], int]]] = []
+    position: dict[int, int] = {}
+    for op, src, out in ops:
+        if isinstance(op, _unary) and src[0] != root and consumers[src[0]] == 1 and src[0] in position:
+            k = position[src[0]]
+            prev_op, prev_src, _ = fused[k]
+            if isinstance(prev_op, _unary):
+                # fresh stage ops, replaying them must not touch the caches of the original graph
+                op, src = Fused({"stages": tuple(s.copy() for s in _stages(prev_op) + _stages(op))}), prev_src
+                fused[k] = None
+        position[out] = len(fused)
+        fused.append((op, src, out))
+    return [instruction for instruction in fused if instruction is not None]
+
+
+def simplify(tape: Tape, inputs: Iterable[Var] = ()) -> Tape:
+    # An optimized copy of a tape: constant folding, algebraic identities, small integer powers
+    # as products and fused unary chains. Leaves that require grad or are listed in inputs stay
+    # variable, every other leaf is treated as a constant from now on.
+    rewriter = _Rewriter(tape, set(inputs))
+    for op, (_, _, src, out) in zip(tape.ops, tape.instructions):
+        rewriter.rewrite(op, src, out)
+
+    root = rewriter.alias[tape.root_slot]
+    ops = _fuse_unary_chains(rewriter.ops, root)
+
+    # dead code elimination
+    live = {root}
+    kept = []
+    for op, src, out in reversed(ops):
+        if out in live:
+            live.update(src)
+            kept.append((op, src, out))
+    kept.reverse()
+    leaves = [(var, slot) for var, slot in rewriter.leaves if slot in live]
+    optimized = Tape.from_ops(tape.root, root, leaves, kept, rewriter.req_grad, rewriter.vals)
+    # the copied ops start with empty caches, one evaluation fills them for backward and forward(changed)
+    optimized.forward()
+    return optimized
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Iterable, Iterator, Optional
+from . import variable
+from .ops import Op, _ndarray
+from .variable import Var
+
+# cones kept per tape, least recently used first out
+_MAX_CONES = 16
+
+
+@contextmanager
+def trace() -> Iterator[None]:
+    # keep the ops of constant subexpressions, so a tape can replay them with new input values
+    prev = variable._mode.tracing
+    variable._mode.tracing = True
+    try:
+        yield
+    finally:
+        variable._mode.tracing = prev
+
+
+class Tape:
+    # A graph recorded once as a flat instruction list (a Wengert list) over value slots.
+    # forward re-reads the leaf values and replays the ops, backward accumulates straight into
+    # the grad of the leaves. Record before Var.backward, which frees the graph.
+    # forward(changed) and update() only replay the cone downstream of the leaves that changed,
+    # every other slot and op cache still holds the value of the last evaluation.
+
+    def __init__(self, root: Var) -> None:
+        leaves: list[tuple[Var, int]] = []
+        ops: list[tuple[Op, tuple[int, ...], int]] = []
+        slots: dict[Var, int] = {}
+        for node in _graph_nodes(root):
+            out = slots[node] = len(slots)
+            if node.op is None:
+                leaves.append((node, out))
+            else:
+                ops.append((node.op, tuple(slots[p] for p in node.src), out))
+        self._setup(root, slots[root], leaves, ops, [node.req_grad for node in slots], [node.val for node in slots])
+
+    @classmethod
+    def from_ops(
+            cls,
+            root: Var,
+            root_slot: int,
+            leaves: list[tuple[Var, int]],
+            ops: list[tuple[Op, tuple[int, ...], int]],
+            req_grad: list[bool],
+            vals: list[Any]
+    ) -> Tape:
+        # a tape over given instructions, slots that are neither leaves nor outputs keep their value
+        tape = cls.__new__(cls)
+        tape._setup(root, root_slot, leaves, ops, req_grad, vals)
+        return tape
+
+    def _setup(
+            self,
+            root: Var,
+            root_slot: int,
+            leaves: list[tuple[Var, int]],
+            ops: list[tuple[Op, tuple[int, ...], int]],
+            req_grad: list[bool],
+            vals: list[Any]
+    ) -> None:
+        self.root = root
+        self.root_slot = root_slot
+        self.leaves = leaves
+        self.req_grad = req_grad
+        self.ops = [op for op, _, _ in ops]
+        self.instructions: list[tuple[Callable[..., Any], Callable[[Any], tuple[Any, ...]], tuple[int, ...], int]] = []
+        for op, src, out in ops:
+            fwd = op.forward
+            if len(op.op_args) != 0:
+                fwd = partial(fwd, **op.op_args)
+            self.instructions.append((fwd, op.backward, src, out))
+
+        self.n_slots = len(vals)
+        self._vals = vals
+        self._grads: list[Any] = [0.0] * self.n_slots
+        self._zeros: list[Any] = [0.0] * self.n_slots
+        self._grad_leaves = [(v, i) for v, i in self.leaves if v.req_grad]
+        self._backward_instructions = [(bwd, src, out) for _, bwd, src, out in reversed(self.instructions)
+                                       if self.req_grad[out]]
+        self._leaf_slots = {v: i for v, i in self.leaves}
+        self._consumers: Optional[list[list[int]]] = None
+        self._cones: OrderedDict[tuple[int, ...], list[tuple[Any, ...]]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self.instructions)
+
+    def forward(self, changed: Optional[Iterable[Var]] = None) -> Any:
+        vals = self._vals
+        if changed is None:
+            for var, i in self.leaves:
+                vals[i] = var.val
+            instructions = self.instructions
+        else:
+            slots = []
+            for var in changed:
+                i = self._leaf_slots[var]
+                vals[i] = var.val
+                slots.append(i)
+            instructions = self._cone(tuple(sorted(set(slots))))
+        for fwd, _, src, out in instructions:
+            vals[out] = fwd(*[vals[i] for i in src])
+        return vals[self.root_slot]
+
+    def update(self) -> Any:
+        # forward over the leaves whose val differs from the last evaluation, array vals count as
+        # changed unless they are the very same object
+        vals = self._vals
+        return self.forward([var for var, i in self.leaves if _changed(var.val, vals[i])])
+
+    def _cone(self, slots: tuple[int, ...]) -> list[tuple[Callable[..., Any], Any, tuple[int, ...], int]]:
+        # the instructions downstream of slots, in tape order
+        cone = self._cones.get(slots)
+        if cone is not None:
+            self._cones.move_to_end(slots)
+            return cone
+        if self._consumers is None:
+            self._consumers = [[] for _ in range(self.n_slots)]
+            for k, (_, _, src, _) in enumerate(self.instructions):
+                for i in set(src):
+                    self._consumers[i].append(k)
+        dirty = set()
+        stack = list(slots)
+        while stack:
+            for k in self._consumers[stack.pop()]:
+                if k not in dirty:
+                    dirty.add(k)
+                    stack.append(self.instructions[k][3])
+        cone = self._cones[slots] = [self.instructions[k] for k in sorted(dirty)]
+        if len(self._cones) > _MAX_CONES:
+            self._cones.popitem(last=False)
+        return cone
+
+    def backward(self, dy: Optional[Any] = None) -> None:
+        assert self.req_grad[self.root_slot], "Root is not part of a autograd graph."
+        grads = self._grads
+        grads[:] = self._zeros
+        grads[self.root_slot] = 1.0 if dy is None else dy
+        for bwd, src, out in self._backward_instructions:
+            for i, dx in zip(src, bwd(grads[out])):
+                grads[i] += dx
+        for var, i in self._grad_leaves:
+            var.accumulate_grad(grads[i])
+
+
+def _changed(val: Any, prev: Any) -> bool:
+    if val is prev:
+        return False
+    return isinstance(val, _ndarray) or isinstance(prev, _ndarray) or val != prev
+
+
+def _graph_nodes(root: Var) -> list[Var]:
+    # every node reachable from root in topological order, leaves and constants included
+    nodes: list[Var] = []
+    visited = set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            nodes.append(node)
+            continue
+        if node in visited:
+            continue
+        visited.add(node)
+        stack.append((node, True))
+        if node.src is not None:
+            for p in reversed(node.src):
+                if p not in visited:
+                    stack.append((p, False))
+    return nodes
@@ -1,10 +1,16 @@
 from __future__ import annotations
 
-from typing import Optional
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, ContextManager, Iterable, Iterator, Mapping, Optional
 from .ops import *
+from .ops import _ndarray, _inference_op, _sum_to
 
 
 class Var:
+    __slots__ = ("val", "op", "src", "req_grad", "grad")
+    __array_ufunc__ = None  # numpy operands defer to the Var operators
+
     def __init__(
             self,
             val: float,
@@ -54,7 +60,7 @@ class Var:
         return _apply(Neg, self)
 
     def __pow__(self, power) -> Var:
-        return _apply(Pow, self, power=power)
+        return _apply(Pow, self, op_args={"power": power})
 
     def exp(self) -> Var:
         return _apply(Exp, self)
@@ -77,10 +83,32 @@ class Var:
     def relu(self) -> Var:
         return _apply(Relu, self)
 
+    def linear(self, w: Var, b: Var) -> Var:
+        return _apply(Linear, self, w, b)
+
+    def reduce_sum(self) -> Var:
+        return _apply(ReduceSum, self)
+
+    @staticmethod
+    def sum(vs: Iterable[float | Var]) -> Var:
+        return _apply(Sum, *map(_align, vs))
+
+    @staticmethod
+    def dot(ws: Iterable[float | Var], xs: Iterable[float | Var]) -> Var:
+        ws, xs = [_align(w) for w in ws], [_align(x) for x in xs]
+        assert len(ws) == len(xs), "Dot needs two sequences of the same length."
+        return _apply(Dot, *ws, *xs)
+
     def accumulate_grad(self, dy: float) -> None:
+        if isinstance(dy, _ndarray):
+            if not isinstance(self.val, _ndarray):
+                # a scalar used by a batched graph collects the gradient of every sample
+                dy = dy.sum().item()
+            elif dy.shape != self.val.shape:
+                dy = _sum_to(dy, self.val.shape)
         self.grad = dy if self.grad is None else self.grad + dy
 
-    def backward(self, dy: Optional[float] = None):
+    def backward(self, dy: Optional[float] = None, retain_graph: bool = False):
         assert self.req_grad, "Node is not part of a autograd graph."
         assert self.grad is None, "Cannot run backward multiple times."
 
@@ -89,40 +117,130 @@ class Var:
         else:
             self.grad = dy
 
-        node_queue = _computed_node_dfs(self, [], set())
-        for node in reversed(node_queue):
-            grads = node.op.backward(node.grad)
-            for x, dy in zip(node.src, grads):
-                if x.req_grad:
-                    x.accumulate_grad(dy)
-            # clear context of non-leaf node
-            node.grad, node.op, node.src = None, None, None
+        if _mode.profiler is not None:
+            _mode.profiler.backward(self, retain_graph)
+            return
+        _sweep(_computed_node_dfs(self), retain_graph)
+
+
+# evaluates one op application in place of the graph building in _apply
+Interpreter = Callable[[type, tuple[Var, ...], Optional[Mapping[str, Any]]], Var]
+
+
+class _Mode(threading.local):
+    interpreter: Optional[Interpreter] = None
+    # set by regrad.tape.trace, keeps constant subgraphs linked so a tape can replay them
+    tracing = False
+    # set by regrad.cse, turns python numbers into shared constant Vars
+    constants: Optional[Callable[[Any], Var]] = None
+    # set by regrad.profile, Var.backward hands its sweep over to it
+    profiler: Optional[Any] = None
+
+
+_mode = _Mode()
+
+
+@contextmanager
+def _interpret(interpreter: Optional[Interpreter]) -> Iterator[None]:
+    prev = _mode.interpreter
+    _mode.interpreter = interpreter
+    try:
+        yield
+    finally:
+        _mode.interpreter = prev
+
+
+def no_grad() -> ContextManager[None]:
+    # values only: no Op objects, no cache and no graph links, for the current thread
+    return _interpret(_apply_no_grad)
 
 
 def _align(v: float | Var) -> Var:
     if isinstance(v, Var):
         return v
+    if _mode.constants is not None:
+        return _mode.constants(v)
     return Var(v)
 
 
-def _apply(op_: type(Op), *var_args: Var, **kwargs: Any) -> Var:
-    op = op_(kwargs)
-    fwd_args = [t.val for t in var_args]
-    val = op.forward(*fwd_args, **kwargs)
-    result_req_grad = any(t.req_grad for t in var_args)
-    if result_req_grad:
-        return Var(val, op=op, src=var_args, req_grad=True)
+def _apply(op_: type(Op), *var_args: Var, op_args: Optional[Mapping[str, Any]] = None) -> Var:
+    interpreter = _mode.interpreter
+    if interpreter is not None:
+        return interpreter(op_, var_args, op_args)
+
+    if op_args is None:
+        op = op_()
+        val = op.forward(*[t.val for t in var_args])
+    else:
+        op = op_(op_args)
+        val = op.forward(*[t.val for t in var_args], **op_args)
+    for t in var_args:
+        if t.req_grad:
+            return Var(val, op=op, src=var_args, req_grad=True)
+    if _mode.tracing:
+        return Var(val, op=op, src=var_args)
 
     return Var(val)
 
 
-def _computed_node_dfs(node: Var, queue: list[Var], visited: set) -> list[Var]:
-    if node not in visited:
+def _apply_under(
+        interpreter: Optional[Interpreter],
+        op_: type(Op),
+        var_args: tuple[Var, ...],
+        op_args: Optional[Mapping[str, Any]]
+) -> Var:
+    # for interpreters that wrap the one that was active before them
+    prev = _mode.interpreter
+    _mode.interpreter = interpreter
+    try:
+        return _apply(op_, *var_args, op_args=op_args)
+    finally:
+        _mode.interpreter = prev
+
+
+def _apply_no_grad(op_: type(Op), var_args: tuple[Var, ...], op_args: Optional[Mapping[str, Any]]) -> Var:
+    op = _inference_op(op_)
+    if op_args is None:
+        return Var(op.forward(*[t.val for t in var_args]))
+    return Var(op.forward(*[t.val for t in var_args], **op_args))
+
+
+def _sweep(
+        node_queue: list[Var],
+        retain_graph: bool,
+        hook: Optional[Callable[[Op, Any], tuple[Any, ...]]] = None
+) -> None:
+    # the reverse sweep of Var.backward over a topological order, hook(op, dy) stands in for
+    # op.backward(dy) when given, as the profiler does to time every op
+    for node in reversed(node_queue):
+        grads = node.op.backward(node.grad) if hook is None else hook(node.op, node.grad)
+        for x, dy in zip(node.src, grads):
+            if x.req_grad:
+                x.accumulate_grad(dy)
+        # clear context of non-leaf node
+        if retain_graph:
+            node.grad = None
+        else:
+            node.grad, node.op, node.src = None, None, None
+
+
+def _computed_node_dfs(*nodes: Var) -> list[Var]:
+    # iterative post-order dfs, an explicit stack keeps deep graphs clear of the recursion limit
+    queue: list[Var] = []
+    visited = set()
+    stack = [(node, False) for node in reversed(nodes)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            queue.append(node)
+            continue
+        if node in visited:
+            continue
         visited.add(node)
         if node.src is None:
-            return []
-        for p in node.src:
-            if p.req_grad:
-                _ = _computed_node_dfs(p, queue, visited)
-        queue.append(node)
+            continue
+        stack.append((node, True))
+        for p in reversed(node.src):
+            if p.req_grad and p not in visited:
+                stack.append((p, False))
     return queue
@@ -0,0 +1,70 @@
+import numpy as np
+from regrad import Var, grad, jacobian, per_sample_grads
+from tools.nn import MLP
+
+
+def f(a: Var, b: Var) -> list[Var]:
+    c = a * b + b ** 3
+    d = (c / (a - 1.0)).tanh() + a.exp().log() * b.sin()
+    return [Var.dot([a, b], [c, d]), (c - d).relu().sqrt() + b.cos(), Var.sum([a, c, 2.0])]
+
+
+def reference_grads(i: int) -> tuple[float, float]:
+    a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    f(a, b)[i].backward()
+    return a.grad, b.grad
+
+
+def test_grad():
+    a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    ys = f(a, b)
+    da, db = grad(ys[0], [a, b])
+    assert a.grad is None and b.grad is None
+    ref_a, ref_b = reference_grads(0)
+    assert abs(da - ref_a) < 1e-9 and abs(db - ref_b) < 1e-9
+
+
+def test_jacobian():
+    a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    jac = jacobian(f(a, b), [a, b, Var(0.0, req_grad=True)])
+    assert jac.shape == (3, 3)
+    for i in range(3):
+        assert np.allclose(jac[i], [*reference_grads(i), 0.0])
+
+
+def test_retain_graph():
+    a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    y = f(a, b)[1]
+    (da,) = grad(y, a, retain_graph=True)
+    y.backward(retain_graph=True)
+    y.backward()
+    assert abs(a.grad - 2 * da) < 1e-9
+    assert y.op is None
+
+
+def test_grad_prunes_unrequested_branches():
+    a, b = Var(2.0, req_grad=True), Var(3.0, req_grad=True)
+    c = Var(0.0, req_grad=True)
+    y = a * b + c.sqrt() * b  # the backward of sqrt at 0 divides by zero
+    da, db = grad(y, [a, Var(1.0)])
+    assert da == 3.0 and db is None
+
+
+def test_per_sample_grads():
+    model = MLP(2, [4, 1])
+    params = model.parameters()
+    data = [(0.3, -0.2), (1.0, 0.5), (-0.7, 0.9)]
+    shared = Var.dot(params, params) * 1e-2  # one subgraph in every loss
+
+    def loss(x1: float, x2: float) -> Var:
+        return (1.0 - model([Var(x1), Var(x2)])).relu() + shared
+
+    expected = []
+    for x in data:
+        model.zero_grad()
+        loss(*x).backward(retain_graph=True)
+        expected.append([p.grad for p in params])
+
+    grads = per_sample_grads([loss(*x) for x in data], params)
+    assert grads.shape == (3, len(params))
+    assert np.allclose(grads, expected)
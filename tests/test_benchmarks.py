@@ -0,0 +1,20 @@
+from regrad import ops
+from benchmarks.suite import OP_INPUTS, compare, op_case
+
+
+def test_suite_covers_every_op():
+    op_classes = {c for c in vars(ops).values() if isinstance(c, type) and issubclass(c, ops.Op) and c is not ops.Op}
+    assert op_classes == set(OP_INPUTS)
+    for op_cls in OP_INPUTS:
+        seconds, calls = op_case(op_cls)()
+        assert seconds > 0 and calls > 0
+
+
+def test_compare():
+    baseline = {"a": {"value": 10.0, "relative": 10.0}, "b": {"value": 10.0, "relative": 10.0}}
+    results = {"a": {"value": 12.0, "relative": 12.0}, "b": {"value": 14.0, "relative": 14.0},
+               "c": {"value": 99.0, "relative": 99.0}}
+    assert compare(results, baseline, 0.3) == ["b"]
+    # on a machine twice as slow the calibration loop is twice as slow as well
+    results = {"a": {"value": 24.0, "relative": 12.0}, "b": {"value": 28.0, "relative": 14.0}}
+    assert compare(results, baseline, 0.3) == ["b"]
@@ -0,0 +1,36 @@
+import math
+import random
+import regrad
+from regrad import Var, checkpoint
+from tools.nn import MLP
+
+
+def test_compile_mlp():
+    random.seed(0)
+    model = MLP(2, [4, 4, 1])
+    compiled = regrad.compile(lambda x, y: (1 + -y * model(x)).relu() + (x[0] * x[1]).tanh() / 2.0)
+
+    for x1, x2, y in [(0.3, -0.2, 1.0), (-1.0, 0.4, -1.0), (0.7, 0.9, 1.0)]:
+        model.zero_grad()
+        x = [Var(x1, req_grad=True), Var(x2)]
+        val = compiled(x, y)
+        grads = [p.grad for p in model.parameters()] + [x[0].grad]
+
+        model.zero_grad()
+        x_ref = [Var(x1, req_grad=True), Var(x2)]
+        y_ref = (1 + -y * model(x_ref)).relu() + (x_ref[0] * x_ref[1]).tanh() / 2.0
+        y_ref.backward()
+        grads_ref = [p.grad for p in model.parameters()] + [x_ref[0].grad]
+
+        assert abs(val - y_ref.val) < 1e-12
+        assert all(abs(g - g_ref) < 1e-12 for g, g_ref in zip(grads, grads_ref))
+    assert len(compiled.programs) == 1
+
+
+def test_compile_retraces_on_structure():
+    compiled = regrad.compile(lambda xs: checkpoint(lambda u: u.exp(), Var.sum(xs)) ** 3)
+    xs = [Var(0.1, req_grad=True), Var(0.2, req_grad=True)]
+    assert abs(compiled(xs) - math.exp(0.9)) < 1e-9
+    compiled([Var(0.1), Var(0.2), Var(0.3, req_grad=True)])
+    assert len(compiled.programs) == 2
+    assert abs(xs[0].grad - 3 * math.exp(0.9)) < 1e-9
@@ -0,0 +1,35 @@
+from regrad import Var, cse
+
+
+def f(a: Var, b: Var) -> Var:
+    c = (b + a) * (a + b) + a ** 2
+    d = (a ** 2).exp() / (b + a) + (-a * 2.0).tanh() * 2.0
+    return c * d + (b + a).relu()
+
+
+def test_cse():
+    a, b = Var(0.4, req_grad=True), Var(-1.1, req_grad=True)
+    with cse() as stats:
+        y = f(a, b)
+    y.backward()
+    assert stats.deduplicated == 4
+    assert stats.constants == 1 and stats.constants_interned == 1
+
+    a_ref, b_ref = Var(0.4, req_grad=True), Var(-1.1, req_grad=True)
+    y_ref = f(a_ref, b_ref)
+    y_ref.backward()
+    assert abs(y.val - y_ref.val) < 1e-12
+    assert abs(a.grad - a_ref.grad) < 1e-12
+    assert abs(b.grad - b_ref.grad) < 1e-12
+
+
+def test_cse_after_backward():
+    p = Var(1.0, req_grad=True)
+    with cse() as stats:
+        y1 = p * p
+        y1.backward()
+        y2 = p * p
+    assert y2 is not y1 and stats.deduplicated == 0
+    p.grad = None
+    y2.backward()
+    assert p.grad == 2.0
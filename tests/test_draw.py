@@ -0,0 +1,54 @@
+import io
+import random
+from regrad import Var
+from tools.draw import build_mermaid_script, export_graph, write_dot
+from tools.nn import MLP
+
+
+def build_loss(model: MLP, n_samples: int) -> Var:
+    data = [(random.uniform(-1, 1), random.uniform(-1, 1)) for _ in range(n_samples)]
+    return Var.sum([model([Var(x1), Var(x2)]).relu() for x1, x2 in data])
+
+
+def test_mermaid():
+    a = Var(0.5, req_grad=True)
+    y = a * a + a.exp()
+    lines = build_mermaid_script(y, "LR").splitlines()
+    assert lines[0] == "graph LR"
+    assert len(lines) == len(set(lines))
+    # a, a * a, exp(a) and y with a style line each, a --> a * a only once
+    assert len([line for line in lines if line.startswith("style")]) == 4
+    assert len([line for line in lines if "-->" in line]) == 4
+    assert len(build_mermaid_script(a).splitlines()) == 3
+
+
+def test_collapse(tmp_path):
+    random.seed(0)
+    loss = build_loss(MLP(2, [4, 4, 1]), 50)
+    full = build_mermaid_script(loss)
+    collapsed = build_mermaid_script(loss, collapse=True)
+    assert len(collapsed) < len(full) / 10
+    assert "Relu ×50" in collapsed
+
+    f = io.StringIO()
+    write_dot(loss, f, collapse=True)
+    dot = f.getvalue()
+    assert dot.startswith("digraph {") and dot.endswith("}\n")
+    assert "Relu ×50" in dot
+
+    export_graph(loss, str(tmp_path / "loss.dot"))
+    export_graph(loss, str(tmp_path / "loss.mmd"))
+    assert (tmp_path / "loss.mmd").read_text(encoding="utf-8") == full
+    assert (tmp_path / "loss.dot").read_text(encoding="utf-8").count("->") == full.count("-->")
+
+    # a node feeding both a consumer and that consumer's other input
+    h = Var(0.5, req_grad=True) * 2.0
+    y = h + h.sin()
+    assert build_mermaid_script(y, collapse=True) == build_mermaid_script(y)
+
+
+def test_deep_graph():
+    x = Var(0.5, req_grad=True)
+    for _ in range(5000):
+        x = x * 1.0
+    assert build_mermaid_script(x).count("-->") == 10000
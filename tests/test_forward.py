@@ -0,0 +1,55 @@
+import numpy as np
+from regrad import Var, jvp
+from tools.nn import Dense
+
+
+def f(a: Var, b: Var) -> list[Var]:
+    c = a * b + b ** 3
+    d = (c / (a - 1.0)).tanh() + a.exp().log() * b.sin()
+    return [Var.dot([a, b], [c, d]), (c - d).relu().sqrt() + b.cos(), Var.sum([a, c, 2.0])]
+
+
+def test_jvp():
+    a_val, b_val = -0.6, 1.3
+    direction = (0.25, -2.0)
+    vals, tangents = jvp(f, (a_val, b_val), direction)
+
+    for i in range(3):
+        a, b = Var(a_val, req_grad=True), Var(b_val, req_grad=True)
+        y = f(a, b)[i]
+        y.backward()
+        assert abs(vals[i] - y.val) < 1e-9
+        assert abs(tangents[i] - (a.grad * direction[0] + b.grad * direction[1])) < 1e-9
+
+
+def test_jvp_vector_tangent():
+    vals, tangents = jvp(f, (-0.6, 1.3), (np.array([1.0, 0.0]), np.array([0.0, 1.0])))
+    for i in range(3):
+        a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+        y = f(a, b)[i]
+        y.backward()
+        assert np.allclose(tangents[i], [a.grad, b.grad])
+
+
+def test_jvp_dense():
+    rng = np.random.default_rng(0)
+    layer = Dense(3, 4)
+    x, tx = rng.uniform(-1, 1, (5, 3)), rng.uniform(-1, 1, (5, 3))
+    w, b = layer.w.val.copy(), layer.b.val.copy()
+    tw, tb = rng.uniform(-1, 1, w.shape), rng.uniform(-1, 1, b.shape)
+
+    val, tangent = jvp(lambda v: (layer(v) * 2.0).reduce_sum(), (x,), (tx,))
+    xs = Var(x, req_grad=True)
+    y = (layer(xs) * 2.0).reduce_sum()
+    y.backward()
+    assert abs(val - y.val) < 1e-12 and abs(tangent - (xs.grad * tx).sum()) < 1e-9
+
+    val, tangent = jvp(lambda *v: Var.linear(*v).relu().reduce_sum(), (x, w, b), (tx, tw, tb))
+    leaves = [Var(v, req_grad=True) for v in (x, w, b)]
+    Var.linear(*leaves).relu().reduce_sum().backward()
+    assert abs(tangent - sum((v.grad * t).sum() for v, t in zip(leaves, (tx, tw, tb)))) < 1e-9
+
+
+def test_jvp_constant_output():
+    assert jvp(lambda a: 2.0, (0.5,), (1.0,)) == (2.0, 0.0)
+    assert jvp(lambda a: [a * 3.0, Var(1.0), 4.0], (0.5,), (1.0,)) == ([1.5, 1.0, 4.0], [3.0, 0.0, 0.0])
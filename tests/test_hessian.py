@@ -0,0 +1,69 @@
+import numpy as np
+import torch
+from regrad import Var, Tape, hvp, simplify, trace
+from tools.nn import MLP
+
+
+def f(a, b, lib):
+    c = a * b + b ** 3
+    d = lib.tanh(c / (a - 1.0)) + lib.log(lib.exp(a)) * lib.sin(b)
+    return d * c + lib.sqrt(c * c) + lib.relu(c) - lib.cos(a) / b
+
+
+def test_hvp():
+    x, v = [-0.6, 1.3], [0.4, -1.1]
+    a, b = Var(x[0], req_grad=True), Var(x[1], req_grad=True)
+    y = f(a, b, Var)
+    g, hv = hvp(y, [a, b], v)
+    assert a.grad is None and b.grad is None
+
+    tx = torch.tensor(x, dtype=torch.float64, requires_grad=True)
+    _, ref_hv = torch.autograd.functional.hvp(lambda t: f(t[0], t[1], torch), tx, torch.tensor(v, dtype=torch.float64))
+    (ref_g,) = torch.autograd.grad(f(tx[0], tx[1], torch), tx)
+    assert np.allclose(g, ref_g.numpy()) and np.allclose(hv, ref_hv.numpy())
+
+    # the graph is left as it was
+    y.backward()
+    assert np.allclose([a.grad, b.grad], ref_g.numpy())
+
+
+def test_hvp_simplified():
+    # fused ops are copied with their stages, the caches of the simplified tape stay as they were
+    a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    with trace():
+        y = f(a, b, Var) + (a * b).tanh().exp().sin()
+    tape = simplify(Tape(y))
+    assert any(op.name == "Fused" for op in tape.ops)
+    tape.forward()
+    tape.backward()
+    grads = a.grad, b.grad
+    a.val, b.val = 0.8, -0.9
+    g, _ = hvp(y, [a, b], [0.4, -1.1], tape)
+    a.val, b.val = -0.6, 1.3
+    a.grad, b.grad = None, None
+    tape.backward()
+    assert (a.grad, b.grad) == grads and g != list(grads)
+
+
+def test_hvp_mlp():
+    model = MLP(2, [4, 1])
+    params = model.parameters()
+    y = Var.sum([(1 + -yi * model([Var(x1), Var(x2)])).relu()
+                 for (x1, x2), yi in [((0.3, -0.5), 1), ((-0.8, 0.2), -1), ((0.6, 0.9), 1)]])
+    y = y + 0.1 * Var.sum([p * p for p in params])
+    tape = Tape(y)
+    hessian = np.array([hvp(y, params, np.eye(len(params))[i], tape)[1] for i in range(len(params))])
+    assert np.allclose(hessian, hessian.T)
+    assert all(p.grad == 0.0 for p in params)
+
+    # against central differences of the gradient, hvp reads the leaf values at every call
+    v = np.random.default_rng(0).uniform(-1, 1, len(params))
+    eps = 1e-5
+    fd = []
+    for sign in (1, -1):
+        for p, vi in zip(params, v):
+            p.val += sign * eps * vi
+        fd.append(np.array(hvp(y, params, v, tape)[0]))
+        for p, vi in zip(params, v):
+            p.val -= sign * eps * vi
+    assert np.allclose((fd[0] - fd[1]) / (2 * eps), hessian @ v, atol=1e-6)
@@ -0,0 +1,47 @@
+import pytest
+from regrad import Var, lazy
+from regrad.lazy import _PENDING
+
+
+def f(a: Var, b: Var) -> tuple[Var, Var]:
+    c = a * b + b ** 3
+    used = (c / (a - 1.0)).tanh() + a.exp().log() * b.sin()
+    unused = Var.sum([(c * k).cos() for k in range(5)])
+    return used, unused
+
+
+def test_lazy():
+    a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    with lazy():
+        y, unused = f(a, b)
+        z = y * 2.0
+    assert y._val is _PENDING and z._val is _PENDING
+    z.backward()
+    assert unused._val is _PENDING
+
+    a_ref, b_ref = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    y_ref, _ = f(a_ref, b_ref)
+    z_ref = y_ref * 2.0
+    z_ref.backward()
+    assert abs(z.val - z_ref.val) < 1e-12
+    assert abs(a.grad - a_ref.grad) < 1e-12 and abs(b.grad - b_ref.grad) < 1e-12
+
+
+def test_lazy_deep():
+    x = Var(0.0)
+    with lazy():
+        for _ in range(100000):
+            x = x + 1.0
+    assert x.val == 100000.0
+
+
+def test_lazy_error():
+    x = Var(-1.0)
+    with lazy():
+        y = x.log() + 1.0
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            y.val
+        assert y._val is _PENDING
+    x.val = 1.0
+    assert y.val == 1.0
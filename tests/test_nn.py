@@ -0,0 +1,113 @@
+import random
+import numpy as np
+import pytest
+from regrad import Var
+from tools.nn import Cell, MLP, Neuron, Dense
+from tools.optim import SGD, Momentum, Adam
+from tools.parallel import DataParallel
+
+
+def test_param_store():
+    model = MLP(3, [4, 2])
+    params = model.parameters()
+    assert model.store.size == len(params) == 4 * 4 + 2 * 5
+    assert [p.index for p in params] == list(range(len(params)))
+    assert model.layers[1].span == slice(16, 26)
+
+    params[5].val = 2.5
+    assert model.store.values[5] == 2.5
+    y = Var.sum(model([Var(0.1), Var(-0.2), Var(0.3)]))
+    y.backward()
+    assert np.array_equal(model.store.grads, [p.grad for p in params])
+
+    model.layers[0].zero_grad()
+    assert not model.store.grads[:16].any()
+    assert model.store.grads[16:].any()
+
+
+def test_optimizers():
+    for optimizer_cls in (SGD, Momentum, Adam):
+        neuron = Neuron(3, is_nonlinear=False)
+        optimizer = optimizer_cls(neuron, lr=0.1)
+        for _ in range(100):
+            optimizer.zero_grad()
+            loss = (neuron([Var(1.0), Var(2.0), Var(-1.0)]) - 3.0) ** 2
+            loss.backward()
+            optimizer.step()
+        assert loss.val < 1e-2
+
+
+def test_tensor_mlp():
+    random.seed(0)
+    scalar = MLP(2, [8, 8, 1])
+    tensor = MLP(2, [8, 8, 1], tensor=True)
+    tensor.store.values[:] = scalar.store.values
+
+    data = np.array([[0.3, -0.2], [1.0, 0.5], [-0.7, 0.9]])
+    label = np.array([1.0, -1.0, 1.0])
+    outputs = [scalar([Var(x1), Var(x2)]) for x1, x2 in data]
+    loss = Var.sum([(1 + -y * out).relu() for y, out in zip(label, outputs)])
+    loss.backward()
+
+    out = tensor(Var(data))
+    loss_tensor = (1 + -label.reshape(-1, 1) * out).relu().reduce_sum()
+    loss_tensor.backward()
+
+    assert abs(loss.val - loss_tensor.val) < 1e-12
+    assert np.allclose(scalar.store.grads, tensor.store.grads)
+
+
+def hinge_loss(model: MLP, x: np.ndarray, y: np.ndarray) -> Var:
+    if not isinstance(model.layers[0], Dense):
+        return Var.sum([(1 + -yi * model([Var(x1), Var(x2)])).relu() for (x1, x2), yi in zip(x.tolist(), y.tolist())])
+    return (1 + -y.reshape(-1, 1) * model(Var(x))).relu().reduce_sum()
+
+
+def test_data_parallel():
+    rng = np.random.default_rng(0)
+    x = rng.uniform(-1, 1, (9, 2))
+    y = np.where(x[:, 0] * x[:, 1] > 0, 1.0, -1.0)
+    for tensor in (False, True):
+        model = MLP(2, [8, 1], tensor=tensor)
+        loss = hinge_loss(model, x, y)
+        loss.backward()
+        expected = model.store.grads.copy()
+
+        model.zero_grad()
+        with DataParallel(model, hinge_loss, processes=2) as parallel:
+            assert abs(parallel.step(x, y) - loss.val) < 1e-12
+            assert np.allclose(model.store.grads, expected)
+            model.store.values[:] = 0.0
+            # the zeroed parameters reach the workers, every sample then sits on the hinge
+            assert abs(parallel.step(x, y) - len(y)) < 1e-12
+
+
+def test_state_dict(tmp_path):
+    for model in (MLP(3, [4, 2]), MLP(3, [4, 2], tensor=True), Neuron(3)):
+        state = model.state_dict()
+        assert len(state["params"]) == len(model.store.values)
+        other = type(model)(**state["config"])
+        other.load_state_dict(state)
+        assert np.array_equal(other.store.values, model.store.values)
+
+        path = str(tmp_path / "model.bin")
+        model.save(path)
+        loaded = type(model).load(path)
+        assert type(loaded) is type(model) and loaded.config() == model.config()
+        assert np.array_equal(loaded.store.values, model.store.values)
+        assert loaded.parameters()[0].val is not None
+        # the loaded parameters are not tied to the file
+        loaded.store.values[:] = 0.0
+        assert model.store.values.any()
+
+    # cells without a config can still be built, only saving needs it
+    class Pair(Cell):
+        def __init__(self) -> None:
+            self.cells = [Neuron(2), Neuron(2)]
+            self.store = None
+
+        def parameters(self) -> list[Var]:
+            return [p for cell in self.cells for p in cell.parameters()]
+
+    with pytest.raises(NotImplementedError):
+        Pair().state_dict()
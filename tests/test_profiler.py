@@ -0,0 +1,29 @@
+import json
+from regrad import Var, no_grad, profile
+from regrad import variable
+
+
+def test_profile(tmp_path):
+    a, b = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    with profile() as prof:
+        y = Var.sum([(a * b).tanh() for _ in range(3)]) + a.exp()
+        y.backward()
+    with no_grad(), prof:
+        (a * b).tanh()
+    assert variable._mode.interpreter is None and variable._mode.profiler is None
+
+    stats = prof.stats
+    assert stats["Mul"].calls == 4 and stats["Mul"].nodes == 3 and stats["Mul"].backward_calls == 3
+    assert stats["Sum"].calls == 1 and stats["Exp"].backward_calls == 1
+    assert prof.queue_sizes == [9]
+    assert all(s.forward_time > 0 for s in stats.values())
+
+    a_ref, b_ref = Var(-0.6, req_grad=True), Var(1.3, req_grad=True)
+    (Var.sum([(a_ref * b_ref).tanh() for _ in range(3)]) + a_ref.exp()).backward()
+    assert a.grad == a_ref.grad and b.grad == b_ref.grad
+
+    assert prof.table().splitlines()[0].split()[0] == "op"
+    prof.to_json(str(tmp_path / "profile.json"))
+    assert json.loads((tmp_path / "profile.json").read_text())["ops"]["Tanh"]["calls"] == 4
+    folded = prof.folded().splitlines()
+    assert "forward;Mul" in [line.rsplit(" ", 1)[0] for line in folded]
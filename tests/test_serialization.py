@@ -0,0 +1,71 @@
+import random
+import numpy as np
+from regrad import Var, save_graph, load_graph
+from regrad.serialization import save_arrays, load_arrays
+from tools.nn import MLP
+
+
+def test_arrays(tmp_path):
+    path = str(tmp_path / "arrays.bin")
+    arrays = {"a": np.arange(10, dtype=np.int16), "b": np.random.rand(3, 5), "empty": np.zeros(0)}
+    save_arrays(path, arrays, {"note": "x"})
+    loaded, meta = load_arrays(path)
+    assert meta == {"note": "x"}
+    for name, a in arrays.items():
+        assert loaded[name].dtype == a.dtype and np.array_equal(loaded[name], a)
+    assert not loaded["b"].flags.writeable
+    assert loaded["b"].ctypes.data % 64 == 0
+
+
+def test_graph(tmp_path):
+    random.seed(0)
+    model = MLP(2, [4, 1])
+    outs = [model([Var(0.3), Var(-0.2)]), model([Var(1.0), Var(0.5)])]
+    loss = Var.sum([(1 - out).relu() ** 2 for out in outs]) + Var.dot(model.parameters(), model.parameters()) / 3.0
+    path = str(tmp_path / "loss.graph")
+    save_graph(loss, path)
+
+    graph = load_graph(path)
+    assert graph.op_name(len(graph) - 1) == "Add"
+    pow_nodes = [i for i in range(len(graph)) if graph.op_name(i) == "Pow"]
+    assert len(pow_nodes) == 2 and graph.op_args(pow_nodes[0]) == {"power": 2}
+    assert all(graph.op_args(i) == {} for i in range(len(graph)) if graph.op_name(i) != "Pow")
+
+    nodes = graph.to_vars()
+    assert nodes[-1].val == loss.val
+    nodes[-1].backward()
+    loss.backward()
+    leaves = [nodes[i] for i in range(len(graph)) if graph.opcode[i] < 0 and graph.req_grad[i]]
+    assert sorted(v.grad for v in leaves) == sorted(p.grad for p in model.parameters())
+
+
+def test_graph_grads(tmp_path):
+    a, b = Var(0.7, req_grad=True), Var(-1.3, req_grad=True)
+    y = (a * b).tanh() + a.exp() ** 3 - (b * b).sqrt()
+    path = str(tmp_path / "y.graph")
+    save_graph(y, path)
+    graph = load_graph(path)
+    nodes = graph.to_vars()
+    # leaves are numbered in the order a depth first walk from the root meets them
+    a_loaded, b_loaded = [nodes[i] for i in range(len(graph)) if graph.op_name(i) is None][:2]
+    y.backward()
+    nodes[-1].backward()
+    assert (a_loaded.grad, b_loaded.grad) == (a.grad, b.grad)
+
+
+def test_tensor_graph(tmp_path):
+    model = MLP(2, [3, 1], tensor=True)
+    x = np.array([[0.3, -0.2], [1.0, 0.5]])
+    loss = (1 - model(Var(x))).relu().reduce_sum()
+    path = str(tmp_path / "tensor.graph")
+    save_graph(loss, path)
+    graph = load_graph(path)
+    nodes = graph.to_vars()
+    assert nodes[-1].val == loss.val
+    nodes[-1].backward()
+    loss.backward()
+    w, _ = model.layers[0].parameters()
+    linear = next(i for i in range(len(graph)) if graph.op_name(i) == "Linear")
+    w_index = int(graph.sources(linear)[1])
+    assert np.array_equal(graph.tensors()[w_index], w.val)
+    assert np.allclose(nodes[w_index].grad, w.grad)
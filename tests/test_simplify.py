@@ -0,0 +1,66 @@
+import math
+from regrad import Var, Tape, trace, simplify
+
+
+def f(a: Var, b: Var, x: Var) -> Var:
+    one, zero = Var(1.0), Var(0.0)
+    c = (a * one + zero) * x ** 2 - (-(-b)) / one
+    d = Var.sum([c, zero, Var(2.0), 3.0]) * (one + one).exp() + (x ** 3 * 0.0 + b ** 1) ** 0
+    e = ((c.tanh() * -1).exp().sin() + Var.dot([a, zero], [b, c])) ** 3
+    return e + d * ((x * a).relu() + 0.5).sqrt() + (2.0 - 2.0) * a
+
+
+def test_simplify():
+    a, b, x = Var(0.7, req_grad=True), Var(-0.3, req_grad=True), Var(1.5)
+    with trace():
+        y = f(a, b, x)
+    tape = Tape(y)
+    optimized = simplify(tape, inputs=[x])
+    assert len(optimized) < len(tape) * 2 // 3
+    assert not any(op.name in ("Pow", "Neg") for op in optimized.ops)
+    assert any(op.name == "Fused" for op in optimized.ops)
+    tape.backward()
+    grads = a.grad, b.grad
+
+    for a_val, b_val, x_val in [(0.7, -0.3, 1.5), (-0.4, 1.2, 0.5), (1.1, 0.2, -2.0)]:
+        a.val, b.val, x.val = a_val, b_val, x_val
+        a.grad, b.grad = None, None
+        y_val = optimized.forward()
+        optimized.backward()
+
+        a_ref, b_ref = Var(a_val, req_grad=True), Var(b_val, req_grad=True)
+        y_ref = f(a_ref, b_ref, Var(x_val))
+        y_ref.backward()
+
+        tol = 1e-9
+        assert abs(y_val - y_ref.val) < tol
+        assert abs(a.grad - a_ref.grad) < tol
+        assert abs(b.grad - b_ref.grad) < tol
+
+    # the original tape still backpropagates from its own evaluation
+    a.grad, b.grad = None, None
+    tape.backward()
+    assert (a.grad, b.grad) == grads
+
+    # simplifying again copies the stages of fused ops instead of sharing them
+    a.val, b.val, x.val = 0.7, -0.3, 1.5
+    optimized.forward()
+    again = simplify(optimized, inputs=[x])
+    a.val, b.val = -0.4, 1.2
+    again.forward()
+    a.grad, b.grad = None, None
+    optimized.backward()
+    assert abs(a.grad - grads[0]) < 1e-9 and abs(b.grad - grads[1]) < 1e-9
+
+
+def test_simplify_backward_after_record():
+    x, y = Var(0.3, req_grad=True), Var(1.1, req_grad=True)
+    optimized = simplify(Tape(x.exp() + y.sin()))
+    optimized.backward()
+    assert abs(x.grad - math.exp(0.3)) < 1e-12 and abs(y.grad - math.cos(1.1)) < 1e-12
+
+    y.val = -0.4
+    x.grad, y.grad = None, None
+    assert abs(optimized.update() - (math.exp(0.3) + math.sin(-0.4))) < 1e-12
+    optimized.backward()
+    assert abs(x.grad - math.exp(0.3)) < 1e-12 and abs(y.grad - math.cos(-0.4)) < 1e-12
@@ -0,0 +1,86 @@
+import math
+from regrad import Var, Tape, trace
+from regrad.tape import _MAX_CONES
+
+
+def f(a: Var, b: Var, x: Var) -> Var:
+    c = a * x + b
+    d = (c * c).relu() + (x ** 2).tanh() * b
+    return d / 2.0 + 10.0 / (1 + (-c).exp())
+
+
+def test_tape_replay():
+    a = Var(-4.0, req_grad=True)
+    b = Var(2.0, req_grad=True)
+    x = Var(0.5)
+    with trace():
+        y = f(a, b, x)
+    tape = Tape(y)
+
+    for a_val, b_val, x_val in [(-4.0, 2.0, 0.5), (1.5, -0.5, 2.0), (0.3, 0.7, -1.0)]:
+        a.val, b.val, x.val = a_val, b_val, x_val
+        a.grad, b.grad = None, None
+        y_val = tape.forward()
+        tape.backward()
+
+        a_ref = Var(a_val, req_grad=True)
+        b_ref = Var(b_val, req_grad=True)
+        y_ref = f(a_ref, b_ref, Var(x_val))
+        y_ref.backward()
+
+        tol = 1e-9
+        assert abs(y_val - y_ref.val) < tol
+        assert abs(a.grad - a_ref.grad) < tol
+        assert abs(b.grad - b_ref.grad) < tol
+
+
+def test_tape_backward_after_record():
+    a = Var(3.0, req_grad=True)
+    y = a * a + a.sin()
+    tape = Tape(y)
+    tape.backward()
+    assert abs(a.grad - (2 * 3.0 + math.cos(3.0))) < 1e-12
+
+
+def test_tape_incremental_forward():
+    def g(a: Var, b: Var, x: Var) -> Var:
+        return f(a, b, x) + Var.sum([(b * k).sin() for k in range(10)])
+
+    a = Var(-4.0, req_grad=True)
+    b = Var(2.0, req_grad=True)
+    x = Var(0.5)
+    with trace():
+        y = g(a, b, x)
+    tape = Tape(y)
+    assert len(tape._cone((tape._leaf_slots[a],))) < len(tape._cone((tape._leaf_slots[b],)))
+
+    for a_val, b_val, x_val in [(1.5, 2.0, 0.5), (1.5, -0.5, 0.5), (1.5, -0.5, 2.0), (0.3, 0.7, -1.0)]:
+        changed = [v for v, val in ((a, a_val), (b, b_val), (x, x_val)) if v.val != val]
+        a.val, b.val, x.val = a_val, b_val, x_val
+        a.grad, b.grad = None, None
+        y_val = tape.forward(changed)
+        tape.backward()
+
+        a_ref = Var(a_val, req_grad=True)
+        b_ref = Var(b_val, req_grad=True)
+        y_ref = g(a_ref, b_ref, Var(x_val))
+        y_ref.backward()
+        assert abs(y_val - y_ref.val) < 1e-9
+        assert abs(a.grad - a_ref.grad) < 1e-9
+        assert abs(b.grad - b_ref.grad) < 1e-9
+
+    b.val = 1.0
+    assert abs(tape.update() - g(Var(a.val), Var(1.0), Var(x.val)).val) < 1e-9
+
+
+def test_tape_cone_cache():
+    xs = [Var(0.1 * i) for i in range(8)]
+    with trace():
+        y = Var.sum([x.sin() * x for x in xs])
+    tape = Tape(y)
+    for k in range(200):
+        subset = [x for i, x in enumerate(xs) if k >> i & 1]
+        for x in subset:
+            x.val += 0.01
+        assert abs(tape.forward(subset) - sum(math.sin(x.val) * x.val for x in xs)) < 1e-9
+    assert len(tape._cones) <= _MAX_CONES
@@ -1,5 +1,8 @@
+import math
+import threading
+import numpy as np
 import torch
-from regrad import Var
+from regrad import Var, no_grad
 
 
 def test_sanity_check():
@@ -155,3 +158,87 @@ def test_log_sqrt():
     # backward pass went well
     assert abs(arg.grad - apt.grad.item()) < tol
     assert abs(brg.grad - bpt.grad.item()) < tol
+
+
+def test_deep_graph():
+    x = Var(0.5, req_grad=True)
+    y = x
+    for _ in range(20000):
+        y = y * 1.0 + 0.0
+    y.backward()
+    assert abs(x.grad - 1.0) < 1e-12
+
+
+def test_batch():
+    samples = [-1.5, -0.2, 0.3, 2.0]
+    a = Var(0.7, req_grad=True)
+    b = Var(-0.4, req_grad=True)
+    x = Var(np.array(samples))
+    y = ((a * x + b).relu() * x.sin() + (x * b).tanh() / a).exp() + (x * x + 1).log().sqrt()
+    y.backward()
+
+    a_grad, b_grad = 0.0, 0.0
+    for i, sample in enumerate(samples):
+        a_ref = Var(0.7, req_grad=True)
+        b_ref = Var(-0.4, req_grad=True)
+        x_ref = Var(sample)
+        y_ref = ((a_ref * x_ref + b_ref).relu() * x_ref.sin() + (x_ref * b_ref).tanh() / a_ref).exp() \
+            + (x_ref * x_ref + 1).log().sqrt()
+        y_ref.backward()
+        assert abs(y.val[i] - y_ref.val) < 1e-9
+        a_grad += a_ref.grad
+        b_grad += b_ref.grad
+
+    assert isinstance(a.grad, float)
+    assert abs(a.grad - a_grad) < 1e-9
+    assert abs(b.grad - b_grad) < 1e-9
+
+
+def test_sum_dot():
+    ws = [Var(0.1 * i - 0.3, req_grad=True) for i in range(6)]
+    xs = [Var(0.5 * i, req_grad=True) for i in range(6)]
+    y = Var.dot(ws, xs) * Var.sum(xs + [1.0]) + Var.dot(ws, ws)
+    y.backward()
+
+    ws_ref = [Var(w.val, req_grad=True) for w in ws]
+    xs_ref = [Var(x.val, req_grad=True) for x in xs]
+    y_ref = sum(w * x for w, x in zip(ws_ref, xs_ref)) * (sum(xs_ref) + 1.0) + sum(w * w for w in ws_ref)
+    y_ref.backward()
+
+    tol = 1e-9
+    assert abs(y.val - y_ref.val) < tol
+    for v, v_ref in zip(ws + xs, ws_ref + xs_ref):
+        assert abs(v.grad - v_ref.grad) < tol
+
+
+def test_no_grad():
+    a = Var(1.5, req_grad=True)
+    with no_grad():
+        y = (a * 2 + a.exp()).relu() ** 2
+    assert y.op is None and y.src is None and not y.req_grad
+    assert abs(y.val - (3.0 + math.exp(1.5)) ** 2) < 1e-12
+
+    @no_grad()
+    def f(x: Var) -> Var:
+        return x.sin() * x
+
+    y = f(a)
+    assert y.op is None and abs(y.val - math.sin(1.5) * 1.5) < 1e-12
+    assert (a * a).req_grad
+
+
+def test_no_grad_thread_local():
+    entered, built = threading.Event(), threading.Event()
+
+    def inference():
+        with no_grad():
+            entered.set()
+            built.wait()
+
+    thread = threading.Thread(target=inference)
+    thread.start()
+    entered.wait()
+    y = Var(2.0, req_grad=True) * 3.0
+    built.set()
+    thread.join()
+    assert y.req_grad and y.op is not None
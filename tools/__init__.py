@@ -1 +1 @@
-from .draw import build_mermaid_script, draw_to_html
+from .draw import build_mermaid_script, draw_to_html, export_graph, write_dot, write_mermaid
@@ -1,17 +1,25 @@
-from typing import Literal
+from __future__ import annotations
+
+import html
+import io
+from typing import Iterator, Literal, TextIO
 from regrad.variable import Var
 from .mermaid import Mermaid
 
+Orientation = Literal["LR", "RL", "TB", "BT"]
+
 _node_colors = {
     "const": ("#E3F2FD", "#0D47A1"),
     "leaf": ("#B3E5FC", "#00796B"),
     "op": ("#ECEFF1", "#546E7A"),
+    "summary": ("#FFF8E1", "#FF8F00"),
 }
 
 
 def get_node_info(node: Var) -> tuple[str, str, str | None]:
     node_name = node.name
-    node_data = f"{node.val:.4f}"
+    shape = getattr(node.val, "shape", None)
+    node_data = f"{node.val:.4f}" if shape is None else f"array{shape}"
     node_args = None
     if node.op is not None and len(node.op.op_args) != 0:
         op_args = [f"{k}={v}" for k, v in node.op.op_args.items()]
@@ -29,52 +37,190 @@ def get_mermaid_node_info(node: Var) -> str:
     return f"{node_id}(\"{label}\")"
 
 
-def get_mermaid_node_style(node: Var) -> str:
-    node_id = str(id(node))
+def _node_kind(node: Var) -> str:
     if not node.req_grad:
-        fill_color, stroke_color = _node_colors["const"]
-    elif node.op is None:
-        fill_color, stroke_color = _node_colors["leaf"]
-    else:
-        fill_color, stroke_color = _node_colors["op"]
-    return f"style {node_id} fill:{fill_color},stroke:{stroke_color}"
+        return "const"
+    if node.op is None:
+        return "leaf"
+    return "op"
 
 
-def _build_mermaid_script(node: Var, _script: str) -> str:
-    if node.src is None:
-        return ""
-
-    for src_node in node.src:
-        if src_node is None:
+def get_mermaid_node_style(node: Var) -> str:
+    fill_color, stroke_color = _node_colors[_node_kind(node)]
+    return f"style {id(node)} fill:{fill_color},stroke:{stroke_color}"
+
+
+def _signatures(root: Var) -> tuple[dict[Var, int], list[int], list[int]]:
+    # structural signature of every node: op, op_args and the signatures of its inputs, but not the
+    # values, interned to ints. Also how many nodes share each signature and its size as a tree,
+    # an upper bound of the nodes below it that is cheap to get.
+    order: list[Var] = []
+    visited = set()
+    stack = [(root, False)]
+    while stack:
+        node, expanded = stack.pop()
+        if expanded:
+            order.append(node)
             continue
-        node_info = get_mermaid_node_info(src_node)
-        if node_info not in _script:
-            _script += node_info + "\n"
-            style = get_mermaid_node_style(src_node)
-            _script += style + "\n"
-
-        edge = f"{str(id(src_node))}-->{str(id(node))}\n"
-        if edge not in _script:
-            _script += edge
-
-        if src_node.src is not None:
-            _script = _build_mermaid_script(src_node, _script)
-
-    return _script
-
-
-def build_mermaid_script(root_node: Var, orientation: Literal["LR", "RL", "TB", "BT"] = "TB") -> str:
-    _script = f"graph {orientation}\n"
-    _script += get_mermaid_node_info(root_node) + "\n"
-    _script += get_mermaid_node_style(root_node) + "\n"
-
-    _script = _build_mermaid_script(root_node, _script)
-
-    return _script
-
-
-def draw_to_html(root_node: Var, name: str, orientation: Literal["LR", "RL", "TB", "BT"] = "TB") -> None:
-    mermaid_script = build_mermaid_script(root_node, orientation=orientation)
-    html = Mermaid(mermaid_script, name)
+        # visited on expansion, so every input is in order before the nodes that read it
+        if node in visited:
+            continue
+        visited.add(node)
+        stack.append((node, True))
+        for p in node.src or ():
+            if p not in visited:
+                stack.append((p, False))
+
+    table: dict[tuple, int] = {}
+    sig: dict[Var, int] = {}
+    counts: list[int] = []
+    sizes: list[int] = []
+    for node in order:
+        src = tuple(sig[p] for p in node.src or ())
+        args = tuple(sorted((k, repr(v)) for k, v in node.op.op_args.items())) if node.op is not None else ()
+        key = (node.name, _node_kind(node), args, src)
+        s = table.get(key)
+        if s is None:
+            s = table[key] = len(counts)
+            counts.append(0)
+            sizes.append(1 + sum(sizes[i] for i in src))
+        counts[s] += 1
+        sig[node] = s
+    return sig, counts, sizes
+
+
+def _walk(root: Var, collapse: bool, min_size: int) -> Iterator[tuple]:
+    # iterative walk visiting every node once, yields ("node", id, node), ("edge", src_id, dst_id) and, with
+    # collapse, ("summary", id, node, instances, size) once at the end for every repeated subgraph it folded
+    if collapse:
+        sig, counts, sizes = _signatures(root)
+    summaries: dict[int, list] = {}
+    edges = set()
+
+    def node_id(node: Var) -> str:
+        if collapse:
+            s = sig[node]
+            if counts[s] > 1 and sizes[s] >= min_size and node.src is not None:
+                summary = summaries.get(s)
+                if summary is None:
+                    summary = summaries[s] = [node, set()]
+                summary[1].add(node)
+                return f"s{s}"
+        return str(id(node))
+
+    root_id = node_id(root)
+    if not root_id.startswith("s"):
+        yield "node", root_id, root
+    visited = {root}
+    stack = [(root, root_id)]
+    while stack:
+        node, nid = stack.pop()
+        if nid.startswith("s") or node.src is None:
+            continue
+        for p in node.src:
+            first = p not in visited
+            if first:
+                visited.add(p)
+            pid = node_id(p)
+            if first and not pid.startswith("s"):
+                yield "node", pid, p
+                stack.append((p, pid))
+            if (pid, nid) not in edges:
+                edges.add((pid, nid))
+                yield "edge", pid, nid
+
+    for s, (node, instances) in summaries.items():
+        yield "summary", f"s{s}", node, len(instances), _count_nodes(node)
+
+
+def _count_nodes(root: Var) -> int:
+    visited = {root}
+    stack = [root]
+    while stack:
+        for p in stack.pop().src or ():
+            if p not in visited:
+                visited.add(p)
+                stack.append(p)
+    return len(visited)
+
+
+def write_mermaid(
+        root_node: Var,
+        f: TextIO,
+        orientation: Orientation = "TB",
+        collapse: bool = False,
+        min_size: int = 3
+) -> None:
+    # streams the graph as Mermaid lines, collapse folds repeated subgraphs of at least min_size nodes
+    f.write(f"graph {orientation}\n")
+    for event in _walk(root_node, collapse, min_size):
+        kind = event[0]
+        if kind == "edge":
+            f.write(f"{event[1]}-->{event[2]}\n")
+        elif kind == "node":
+            node = event[2]
+            f.write(get_mermaid_node_info(node) + "\n")
+            f.write(get_mermaid_node_style(node) + "\n")
+        else:
+            _, sid, node, instances, size = event
+            label = f"<b>{node.name} ×{instances}</b><br><small>{size} nodes each</small>"
+            fill_color, stroke_color = _node_colors["summary"]
+            f.write(f"{sid}[[\"{label}\"]]\n")
+            f.write(f"style {sid} fill:{fill_color},stroke:{stroke_color}\n")
+
+
+def write_dot(
+        root_node: Var,
+        f: TextIO,
+        orientation: Orientation = "TB",
+        collapse: bool = False,
+        min_size: int = 3
+) -> None:
+    # streams the graph as Graphviz DOT
+    f.write(f"digraph {{\nrankdir={orientation};\nnode [shape=box, style=\"rounded,filled\"];\n")
+    for event in _walk(root_node, collapse, min_size):
+        kind = event[0]
+        if kind == "edge":
+            f.write(f"{event[1]} -> {event[2]};\n")
+            continue
+        if kind == "node":
+            _, nid, node = event
+            node_name, node_args, node_data = get_node_info(node)
+            small = html.escape(node_data)
+            if node_args is not None:
+                small = f"{html.escape(node_args)}<BR/>{small}"
+            label = f"<B>{html.escape(node_name)}</B><BR/><FONT POINT-SIZE=\"10\">{small}</FONT>"
+            fill_color, stroke_color = _node_colors[_node_kind(node)]
+        else:
+            _, nid, node, instances, size = event
+            label = (f"<B>{html.escape(node.name)} ×{instances}</B><BR/>"
+                     f"<FONT POINT-SIZE=\"10\">{size} nodes each</FONT>")
+            fill_color, stroke_color = _node_colors["summary"]
+        f.write(f"{nid} [label=<{label}>, fillcolor=\"{fill_color}\", color=\"{stroke_color}\"];\n")
+    f.write("}\n")
+
+
+def export_graph(
+        root_node: Var,
+        path: str,
+        orientation: Orientation = "TB",
+        collapse: bool = False,
+        min_size: int = 3
+) -> None:
+    # DOT for .dot and .gv files, Mermaid otherwise
+    writer = write_dot if path.endswith((".dot", ".gv")) else write_mermaid
+    with open(path, "w", encoding="utf-8") as f:
+        writer(root_node, f, orientation, collapse, min_size)
+
+
+def build_mermaid_script(root_node: Var, orientation: Orientation = "TB", collapse: bool = False) -> str:
+    f = io.StringIO()
+    write_mermaid(root_node, f, orientation, collapse)
+    return f.getvalue()
+
+
+def draw_to_html(root_node: Var, name: str, orientation: Orientation = "TB", collapse: bool = False) -> None:
+    mermaid_script = build_mermaid_script(root_node, orientation=orientation, collapse=collapse)
+    html_ = Mermaid(mermaid_script, name)
     with open(name + ".html", "w", encoding="utf-8") as f:
-        f.write(repr(html))
+        f.write(repr(html_))
@@ -1,11 +1,129 @@
-from typing import Iterable, Any
+from __future__ import annotations
+
+from typing import Iterable, Any, Optional
 from abc import ABC, abstractmethod
+from array import array
 import random
 from regrad import Var
+from regrad.serialization import save_arrays, load_arrays
+
+try:
+    import numpy as np
+except ImportError:  # the flat views are only needed by the optimizers
+    np = None
+
+
+class ParamStore:
+    # all parameters of a model in one contiguous buffer, the gradients in a matching one
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self.allocated = 0
+        self.data = array("d", bytes(8 * size))
+        self.grad = array("d", bytes(8 * size))
+        self._bind_views()
+
+    def _bind_views(self) -> None:
+        # numpy views over the same memory, for whole-buffer updates
+        if np is not None:
+            self.values = np.frombuffer(self.data, dtype=np.float64)
+            self.grads = np.frombuffer(self.grad, dtype=np.float64)
+
+    def _attach(self, data: Any, grad: Any) -> None:
+        # move onto other buffers of doubles (e.g. shared memory), parameters read through the store so follow along
+        self.data, self.grad = data, grad
+        self._bind_views()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # the numpy views would unpickle as copies, rebuild them over the unpickled buffers instead
+        return {"size": self.size, "allocated": self.allocated, "data": self.data, "grad": self.grad}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._bind_views()
+
+    def new(self, val: float) -> "Param":
+        assert self.allocated < self.size, "Parameter store is full."
+        self.allocated += 1
+        return Param(self, self.allocated - 1, val)
+
+    def new_block(self, n_rows: int, n_cols: int) -> tuple["np.ndarray", "np.ndarray"]:
+        # (values, grads) views of the next n_rows * n_cols entries, row major
+        start = self.allocated
+        assert start + n_rows * n_cols <= self.size, "Parameter store is full."
+        self.allocated += n_rows * n_cols
+        span = slice(start, self.allocated)
+        return self.values[span].reshape(n_rows, n_cols), self.grads[span].reshape(n_rows, n_cols)
+
+
+class Param(Var):
+    __slots__ = ("store", "index")
+
+    def __init__(self, store: ParamStore, index: int, val: float) -> None:
+        self.store = store
+        self.index = index
+        super().__init__(val, req_grad=True)
+
+    @property
+    def val(self) -> float:
+        return self.store.data[self.index]
+
+    @val.setter
+    def val(self, v: float) -> None:
+        self.store.data[self.index] = v
+
+    @property
+    def grad(self) -> float:
+        return self.store.grad[self.index]
+
+    @grad.setter
+    def grad(self, dy: Optional[float]) -> None:
+        self.store.grad[self.index] = 0.0 if dy is None else dy
+
+
+class TensorParam(Var):
+    # an array parameter, val and grad are views into the store at index of the (n_rows, n_cols) block from start
+    __slots__ = ("store", "start", "shape", "index")
+
+    def __init__(self, store: ParamStore, start: int, shape: tuple[int, int], index: Any) -> None:
+        self.store = store
+        self.start = start
+        self.shape = shape
+        self.index = index
+        super().__init__(self._view(store.values), req_grad=True)
+
+    def _view(self, buffer: "np.ndarray") -> "np.ndarray":
+        n_rows, n_cols = self.shape
+        return buffer[self.start:self.start + n_rows * n_cols].reshape(n_rows, n_cols)[self.index]
+
+    @property
+    def val(self) -> "np.ndarray":
+        return self._view(self.store.values)
+
+    @val.setter
+    def val(self, v: "np.ndarray") -> None:
+        self._view(self.store.values)[...] = v
+
+    @property
+    def grad(self) -> "np.ndarray":
+        return self._view(self.store.grads)
+
+    @grad.setter
+    def grad(self, dy: Optional["np.ndarray"]) -> None:
+        self._view(self.store.grads)[...] = 0.0 if dy is None else dy
 
 
 class Cell(ABC):
+    store: Optional[ParamStore] = None
+    span: Optional[slice] = None  # the range of store holding the parameters of this cell
+
+    def _bind(self, store: ParamStore, start: int) -> None:
+        self.store = store
+        self.span = slice(start, store.allocated)
+
     def zero_grad(self) -> None:
+        if self.store is not None and np is not None:
+            self.store.grads[self.span] = 0.0
+            return
         for p in self.parameters():
             p.grad = 0
 
@@ -13,15 +131,56 @@ class Cell(ABC):
     def parameters(self) -> list[Var]:
         raise NotImplementedError("Subclasses must implement the \"parameters\" method.")
 
+    def config(self) -> dict[str, Any]:
+        # the constructor arguments that rebuild the architecture, needed by state_dict and save
+        raise NotImplementedError("Subclasses must implement the \"config\" method.")
+
+    def state_dict(self) -> dict[str, Any]:
+        # the architecture and a copy of the parameters, flat in store order
+        config = self.config()
+        if self.store is not None and np is not None:
+            params = self.store.values[self.span].copy()
+        else:
+            params = array("d", [p.val for p in self.parameters()])
+        return {"cell": type(self).__name__, "config": config, "params": params}
+
+    def load_state_dict(self, state: dict[str, Any]) -> None:
+        assert state["cell"] == type(self).__name__ and state["config"] == self.config(), \
+            "The state belongs to a different architecture."
+        if self.store is not None and np is not None:
+            self.store.values[self.span] = state["params"]
+            return
+        for p, v in zip(self.parameters(), state["params"]):
+            p.val = v
+
+    def save(self, path: str) -> None:
+        # one file: the architecture in the header, the parameters as one float64 array
+        state = self.state_dict()
+        save_arrays(path, {"params": state.pop("params")}, {"format": "regrad-cell", **state})
+
+    @classmethod
+    def load(cls, path: str) -> "Cell":
+        # builds the saved architecture, then overwrites its parameters with those of the memory-mapped file
+        arrays, meta = load_arrays(path)
+        assert meta.get("format") == "regrad-cell", f"{path} does not hold a cell."
+        cell_cls = _cells[meta["cell"]]
+        assert issubclass(cell_cls, cls), f"{path} holds a {meta['cell']}, not a {cls.__name__}."
+        cell = cell_cls(**meta["config"])
+        cell.load_state_dict({"cell": meta["cell"], "config": meta["config"], "params": arrays["params"]})
+        return cell
+
 
 class Neuron(Cell):
-    def __init__(self, n_in: int, is_nonlinear: bool = True) -> None:
-        self.w = [Var(random.uniform(-1, 1), req_grad=True) for _ in range(n_in)]
-        self.b = Var(0.0, req_grad=True)
+    def __init__(self, n_in: int, is_nonlinear: bool = True, store: Optional[ParamStore] = None) -> None:
+        store = ParamStore(n_in + 1) if store is None else store
+        start = store.allocated
+        self.w = [store.new(random.uniform(-1, 1)) for _ in range(n_in)]
+        self.b = store.new(0.0)
         self.is_nonlinear = is_nonlinear
+        self._bind(store, start)
 
     def __call__(self, x: Iterable[Var]) -> Var:
-        y = sum((wi * xi for wi, xi in zip(self.w, x)), self.b)
+        y = Var.dot(self.w, x) + self.b
         if self.is_nonlinear:
             return y.relu()
         return y
@@ -29,13 +188,19 @@ class Neuron(Cell):
     def parameters(self) -> list[Var]:
         return self.w + [self.b]
 
+    def config(self) -> dict[str, Any]:
+        return {"n_in": len(self.w), "is_nonlinear": self.is_nonlinear}
+
     def __repr__(self) -> str:
         return f"{'ReLU' if self.is_nonlinear else 'Linear'}-Neuron({len(self.w)})"
 
 
 class Layer(Cell):
-    def __init__(self, n_in: int, n_out: int, **kwargs: Any) -> None:
-        self.neurons = [Neuron(n_in, **kwargs) for _ in range(n_out)]
+    def __init__(self, n_in: int, n_out: int, store: Optional[ParamStore] = None, **kwargs: Any) -> None:
+        store = ParamStore(n_out * (n_in + 1)) if store is None else store
+        start = store.allocated
+        self.neurons = [Neuron(n_in, store=store, **kwargs) for _ in range(n_out)]
+        self._bind(store, start)
 
     def __call__(self, x: Iterable[Var]) -> list[Var] | Var:
         out = [n(x) for n in self.neurons]
@@ -46,17 +211,57 @@ class Layer(Cell):
     def parameters(self) -> list[Var]:
         return [p for n in self.neurons for p in n.parameters()]
 
+    def config(self) -> dict[str, Any]:
+        n = self.neurons[0]
+        return {"n_in": len(n.w), "n_out": len(self.neurons), "is_nonlinear": n.is_nonlinear}
+
     def __repr__(self) -> str:
         return f"Layer-[{', '.join(str(n) for n in self.neurons)}]"
 
 
+class Dense(Cell):
+    # a whole layer as one Linear node over a batch of shape (..., n_in), same store layout as Layer
+    def __init__(self, n_in: int, n_out: int, is_nonlinear: bool = True, store: Optional[ParamStore] = None) -> None:
+        store = ParamStore(n_out * (n_in + 1)) if store is None else store
+        start = store.allocated
+        block, _ = store.new_block(n_out, n_in + 1)
+        block[:, :-1] = [[random.uniform(-1, 1) for _ in range(n_in)] for _ in range(n_out)]
+        self.w = TensorParam(store, start, (n_out, n_in + 1), (slice(None), slice(None, -1)))
+        self.b = TensorParam(store, start, (n_out, n_in + 1), (slice(None), -1))
+        self.is_nonlinear = is_nonlinear
+        self._bind(store, start)
+
+    def __call__(self, x: Var) -> Var:
+        y = x.linear(self.w, self.b)
+        if self.is_nonlinear:
+            return y.relu()
+        return y
+
+    def parameters(self) -> list[Var]:
+        return [self.w, self.b]
+
+    def config(self) -> dict[str, Any]:
+        n_out, n_cols = self.w.shape
+        return {"n_in": n_cols - 1, "n_out": n_out, "is_nonlinear": self.is_nonlinear}
+
+    def __repr__(self) -> str:
+        n_out, n_in = self.w.val.shape
+        return f"{'ReLU' if self.is_nonlinear else 'Linear'}-Dense({n_in}, {n_out})"
+
+
 class MLP(Cell):
-    def __init__(self, n_in: int, n_layers_out: list[int]):
+    # tensor=True builds Dense layers, called with one Var holding a (batch, n_in) array
+    def __init__(self, n_in: int, n_layers_out: list[int], store: Optional[ParamStore] = None, tensor: bool = False):
         n_in_out = [n_in] + n_layers_out
-        self.layers = [Layer(n_in_out[i], n_in_out[i + 1], is_nonlinear=i != len(n_layers_out) - 1)
+        if store is None:
+            store = ParamStore(sum((n_in_out[i] + 1) * n_in_out[i + 1] for i in range(len(n_layers_out))))
+        start = store.allocated
+        layer_cls = Dense if tensor else Layer
+        self.layers = [layer_cls(n_in_out[i], n_in_out[i + 1], store=store, is_nonlinear=i != len(n_layers_out) - 1)
                        for i in range(len(n_layers_out))]
+        self._bind(store, start)
 
-    def __call__(self, x: Iterable[Var]) -> Var:
+    def __call__(self, x: Iterable[Var] | Var) -> Var:
         for layer in self.layers:
             x = layer(x)
         return x
@@ -64,5 +269,13 @@ class MLP(Cell):
     def parameters(self) -> list[Var]:
         return [p for layer in self.layers for p in layer.parameters()]
 
+    def config(self) -> dict[str, Any]:
+        n_in = self.layers[0].config()["n_in"]
+        return {"n_in": n_in, "n_layers_out": [layer.config()["n_out"] for layer in self.layers],
+                "tensor": isinstance(self.layers[0], Dense)}
+
     def __repr__(self) -> str:
         return f"MLP-[{', '.join(str(layer) for layer in self.layers)}]"
+
+
+_cells = {cls.__name__: cls for cls in (Neuron, Layer, Dense, MLP)}
@@ -0,0 +1,55 @@
+import numpy as np
+from .nn import Cell
+
+
+class Optimizer:
+    # updates every parameter of a cell at once, through the numpy views of its parameter store
+    def __init__(self, cell: Cell, lr: float) -> None:
+        assert cell.store is not None, "The cell has no parameter store."
+        self.lr = lr
+        self.values = cell.store.values[cell.span]
+        self.grads = cell.store.grads[cell.span]
+
+    def zero_grad(self) -> None:
+        self.grads[:] = 0.0
+
+    def step(self) -> None:
+        raise NotImplementedError("Subclasses must implement the step method.")
+
+
+class SGD(Optimizer):
+    def step(self) -> None:
+        self.values -= self.lr * self.grads
+
+
+class Momentum(Optimizer):
+    def __init__(self, cell: Cell, lr: float, momentum: float = 0.9) -> None:
+        super().__init__(cell, lr)
+        self.momentum = momentum
+        self.velocity = np.zeros_like(self.values)
+
+    def step(self) -> None:
+        self.velocity *= self.momentum
+        self.velocity += self.grads
+        self.values -= self.lr * self.velocity
+
+
+class Adam(Optimizer):
+    def __init__(self, cell: Cell, lr: float = 1e-3, betas: tuple[float, float] = (0.9, 0.999), eps: float = 1e-8):
+        super().__init__(cell, lr)
+        self.betas = betas
+        self.eps = eps
+        self.t = 0
+        self.m = np.zeros_like(self.values)
+        self.v = np.zeros_like(self.values)
+
+    def step(self) -> None:
+        beta1, beta2 = self.betas
+        self.t += 1
+        self.m *= beta1
+        self.m += (1 - beta1) * self.grads
+        self.v *= beta2
+        self.v += (1 - beta2) * self.grads ** 2
+        m_hat = self.m / (1 - beta1 ** self.t)
+        v_hat = self.v / (1 - beta2 ** self.t)
+        self.values -= self.lr * m_hat / (np.sqrt(v_hat) + self.eps)
@@ -0,0 +1,68 @@
+import multiprocessing
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Callable, Optional
+import numpy as np
+from regrad import Var
+from .nn import Cell
+
+# loss_fn(model, x_shard, y_shard) -> the loss summed over the shard, a module level function so it pickles
+LossFn = Callable[[Cell, np.ndarray, np.ndarray], Var]
+
+_worker: dict[str, Any] = {}
+
+
+def _init_worker(model: Cell, loss_fn: LossFn, values_name: str, grads_name: str, n_shards: int) -> None:
+    # every worker gets its own copy of the model once, its store then reads the parameters from shared memory
+    values, grads = SharedMemory(name=values_name), SharedMemory(name=grads_name)
+    size = model.store.size
+    model.store._attach(values.buf.cast("d"), model.store.grad)
+    _worker.update(model=model, loss_fn=loss_fn, shm=(values, grads),
+                   grads=np.ndarray((n_shards, size), dtype=np.float64, buffer=grads.buf))
+
+
+def _worker_step(shard: int, x: np.ndarray, y: np.ndarray) -> float:
+    model = _worker["model"]
+    model.store.grads[:] = 0.0
+    loss = _worker["loss_fn"](model, x, y)
+    loss.backward()
+    _worker["grads"][shard] = model.store.grads
+    return loss.val
+
+
+class DataParallel:
+    # shards each minibatch over a process pool, parameters go out and gradients come back through shared memory
+    def __init__(self, model: Cell, loss_fn: LossFn, processes: Optional[int] = None) -> None:
+        assert model.store is not None, "The model has no parameter store."
+        self.model = model
+        self.processes = processes or multiprocessing.cpu_count()
+        size = model.store.size
+        self._values_shm = SharedMemory(create=True, size=8 * size)
+        self._grads_shm = SharedMemory(create=True, size=8 * size * self.processes)
+        self._values = np.ndarray(size, dtype=np.float64, buffer=self._values_shm.buf)
+        self._grads = np.ndarray((self.processes, size), dtype=np.float64, buffer=self._grads_shm.buf)
+        self._pool = multiprocessing.Pool(
+            self.processes, _init_worker,
+            (model, loss_fn, self._values_shm.name, self._grads_shm.name, self.processes))
+
+    def step(self, x: np.ndarray, y: np.ndarray) -> float:
+        # accumulates the gradient of the summed loss into model.store.grads and returns the summed loss
+        self._values[:] = self.model.store.values
+        shards = [(i, xs, ys) for i, (xs, ys) in
+                  enumerate(zip(np.array_split(x, self.processes), np.array_split(y, self.processes))) if len(xs)]
+        losses = self._pool.starmap(_worker_step, shards)
+        self.model.store.grads += self._grads[:len(shards)].sum(axis=0)
+        return sum(losses)
+
+    def close(self) -> None:
+        self._pool.close()
+        self._pool.join()
+        del self._values, self._grads
+        for shm in (self._values_shm, self._grads_shm):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self) -> "DataParallel":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()